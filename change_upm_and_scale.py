@@ -1,58 +1,77 @@
 import os
 import sys
+import time
+import shutil
 from fontTools.ttLib import TTFont
+from scale_font import fix_gvar_table, scale_outlines, scale_metrics, update_font_bounds
 
-def change_upm_and_scale(font_path, output_path):
+def print_timings(timings):
+    """Print the per-step/per-table timing breakdown, slowest first."""
+    total = sum(timings.values())
+    print("\n耗时明细:")
+    for name, seconds in sorted(timings.items(), key=lambda item: item[1], reverse=True):
+        share = seconds / total if total else 0
+        print(f"  {name:<12} {seconds:7.3f}s  {share:6.1%}")
+    print(f"  {'合计':<12} {total:7.3f}s")
+
+def change_upm_and_scale(font_path, output_path, new_upm=1000):
+    """Convert a TrueType font to `new_upm`, rescaling every unit-bearing table in one pass."""
+    timings = {}
+    start = time.time()
     font = TTFont(font_path)
+    timings['加载'] = time.time() - start
+
     old_upm = font['head'].unitsPerEm
     print(f"原 UPM 值: {old_upm}")
-    print(f"需要几秒时间，请耐心等待 请不要乱按(^O^) ")
+    if old_upm == new_upm:
+        # 不做转换，原样复制，后续步骤照常使用输出文件
+        font.close()
+        shutil.copyfile(font_path, output_path)
+        print(f"UPM 已经是 {new_upm}，无需转换，已复制为 {output_path}")
+        return
     # 计算缩放因子
-    scale_factor = 1000 / old_upm
-
-    # 修改 UPM 值为 1000
-    font['head'].unitsPerEm = 1000
-
-    # 调整字符轮廓和度量信息
-    # 处理 hmtx 表
-    hmtx_table = font['hmtx']
-    for name in hmtx_table.metrics.keys():
-        hmtx_table.metrics[name] = (int(hmtx_table.metrics[name][0] * scale_factor), hmtx_table.metrics[name][1])
-
-    # 处理 glyf 表
-    glyf_table = font['glyf']
-    for name in glyf_table.keys():
-        glyph = glyf_table[name]
-        if glyph.isComposite():
-            # 对于组合字形，调整每个组件的变换
-            for component in glyph.components:
-                # 组合字形的变换处理
-                if hasattr(component, 'transform'):
-                    component.transform = (
-                        component.transform[0] * scale_factor,
-                        component.transform[1] * scale_factor,
-                        component.transform[2],
-                        component.transform[3],
-                        component.transform[4] * scale_factor,
-                        component.transform[5] * scale_factor,
-                    )
-        else:
-            # 对于普通字形，调整轮廓
-            coordinates = glyph.getCoordinates(font['glyf'])[0]
-            for i in range(len(coordinates)):
-                coordinates[i] = (int(coordinates[i][0] * scale_factor), int(coordinates[i][1] * scale_factor))
-            glyph.coordinates = coordinates  # 更新坐标
+    scale_factor = new_upm / old_upm
+
+    if 'gvar' in font:
+        start = time.time()
+        fix_gvar_table(font)
+        timings['gvar 检查'] = time.time() - start
+
+    # glyf 轮廓、组件偏移和 gvar 增量（含幻影点）在同一遍中向量化缩放；
+    # cvt 同步缩放，字形指令保留
+    start = time.time()
+    bounds, has_outline = scale_outlines(font, scale_factor, phantom_scale=scale_factor, keep_hinting=True)
+    timings['glyf+gvar'] = time.time() - start
+
+    # hmtx/vmtx、OS/2、hhea、vhea、post、kern、GPOS、GDEF、HVAR、MVAR 等
+    scale_metrics(font, scale_factor, timings)
+
+    start = time.time()
+    update_font_bounds(font, bounds, has_outline)
+    font['head'].unitsPerEm = new_upm
+    timings['head/hhea'] = time.time() - start
 
     # 保存修改后的字体
+    start = time.time()
     font.save(output_path)
+    timings['保存'] = time.time() - start
+
+    print_timings(timings)
     print(f"修改后的字体已保存至 {output_path}")
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--upm')]
+    if not args:
         print("请提供要修改的字体文件路径。")
+        print("用法: python change_upm_and_scale.py <字体文件.ttf> [输出文件.ttf] [--upm=1000]")
         sys.exit(1)
 
-    font_path = sys.argv[1]
+    new_upm = 1000
+    for arg in sys.argv[1:]:
+        if arg.startswith('--upm='):
+            new_upm = int(arg.split('=', 1)[1])
+
+    font_path = args[0]
     # 生成输出文件名
-    output_path = f"UPM1000_{os.path.basename(font_path)}"    
-    change_upm_and_scale(font_path, output_path)
+    output_path = args[1] if len(args) > 1 else f"UPM{new_upm}_{os.path.basename(font_path)}"
+    change_upm_and_scale(font_path, output_path, new_upm)
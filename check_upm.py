@@ -1,17 +1,14 @@
 import os
-from fontTools.ttLib import TTFont
+from font_catalog import entries
 
 def get_upm_values(directory):
     upm_list = []
-    for filename in os.listdir(directory):
-        if filename.endswith('.ttf'):
-            font_path = os.path.join(directory, filename)
-            try:
-                font = TTFont(font_path)
-                upm = font['head'].unitsPerEm
-                upm_list.append(f"{filename}    UPM {upm}")
-            except Exception as e:
-                print(f"Error processing {filename}: {e}")
+    # UPM 来自目录清单，只有新增或改动的文件才会重新读取
+    for row in entries(directory, ('.ttf',)):
+        if row['error']:
+            print(f"Error processing {row['name']}: {row['error']}")
+            continue
+        upm_list.append(f"{row['name']}    UPM {row['upm']}")
     return upm_list
 
 if __name__ == "__main__":
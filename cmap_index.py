@@ -0,0 +1,146 @@
+import sys
+import weakref
+import numpy as np
+from fontTools.ttLib import TTFont
+from fontTools.ttLib.tables._c_m_a_p import CmapSubtable
+
+# 每个已加载字体只建一次索引；字体对象释放后缓存随之失效
+_cache = weakref.WeakKeyDictionary()
+
+class CmapIndex:
+    """Codepoint <-> glyph lookups for one loaded font, built once from its cmap.
+
+    The forward map is the best Unicode cmap, filled in from the other
+    Unicode subtables, stored as a sorted codepoint array so batches of
+    codepoints resolve with one searchsorted. Unicode variation sequences
+    from the format 14 subtable are kept alongside, and both directions
+    can be reversed per glyph.
+    """
+
+    def __init__(self, font):
+        cmap = font['cmap']
+        mapping = {}
+        variations = {}
+        for table in cmap.tables:
+            if table.format == 14:
+                for selector, records in table.uvsDict.items():
+                    for base, glyph_name in records:
+                        variations[(base, selector)] = glyph_name
+            elif table.isUnicode():
+                for cp, glyph_name in table.cmap.items():
+                    mapping.setdefault(cp, glyph_name)
+        best = cmap.getBestCmap() or {}
+        mapping.update(best)
+
+        self.codepoints = np.array(sorted(mapping), dtype=np.int64)
+        self.glyph_names = np.array([mapping[cp] for cp in self.codepoints.tolist()], dtype=object)
+        reverse_map = font.getReverseGlyphMap()
+        self.glyph_ids = np.array([reverse_map.get(name, 0) for name in self.glyph_names], dtype=np.int64)
+        self.mapping = mapping
+
+        # UVS 记录的字形为 None 表示使用基本字符的默认字形
+        self.variations = {key: glyph_name if glyph_name is not None else mapping.get(key[0])
+                           for key, glyph_name in variations.items()}
+
+        self.reverse = {}
+        for cp, glyph_name in mapping.items():
+            self.reverse.setdefault(glyph_name, []).append(cp)
+        self.reverse_variations = {}
+        for key, glyph_name in self.variations.items():
+            if glyph_name is not None:
+                self.reverse_variations.setdefault(glyph_name, []).append(key)
+
+    def __len__(self):
+        return len(self.codepoints)
+
+    def __contains__(self, codepoint):
+        return codepoint in self.mapping
+
+    def glyph(self, codepoint, selector=None):
+        """Glyph name for one codepoint (or variation sequence), or None."""
+        if selector is not None:
+            return self.variations.get((codepoint, selector))
+        return self.mapping.get(codepoint)
+
+    def _positions(self, codepoints):
+        codepoints = np.asarray(codepoints, dtype=np.int64)
+        positions = np.searchsorted(self.codepoints, codepoints)
+        positions = np.minimum(positions, max(len(self.codepoints) - 1, 0))
+        found = (self.codepoints[positions] == codepoints) if len(self.codepoints) else np.zeros(codepoints.shape, bool)
+        return positions, found
+
+    def contains(self, codepoints):
+        """Boolean mask of which codepoints in an array are mapped."""
+        return self._positions(codepoints)[1]
+
+    def lookup(self, codepoints):
+        """Glyph names for an array of codepoints; unmapped codepoints give None."""
+        positions, found = self._positions(codepoints)
+        return np.where(found, self.glyph_names[positions], None).tolist()
+
+    def lookup_ids(self, codepoints):
+        """Glyph IDs for an array of codepoints; unmapped codepoints give -1."""
+        positions, found = self._positions(codepoints)
+        return np.where(found, self.glyph_ids[positions], -1)
+
+    def codepoints_for(self, glyph_name):
+        """All codepoints that map to glyph_name."""
+        return self.reverse.get(glyph_name, [])
+
+    def variations_for(self, glyph_name):
+        """All (base, selector) variation sequences that map to glyph_name."""
+        return self.reverse_variations.get(glyph_name, [])
+
+    def select(self, ranges):
+        """{codepoint: glyph name} for the mapped codepoints inside a CodepointRanges."""
+        starts = np.searchsorted(self.codepoints, ranges.starts, side='left')
+        ends = np.searchsorted(self.codepoints, ranges.ends, side='right')
+        selected = {}
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            selected.update(zip(self.codepoints[start:end].tolist(), self.glyph_names[start:end].tolist()))
+        return selected
+
+def cmap_index(font):
+    """Return the cached CmapIndex of a loaded font, building it on first use."""
+    index = _cache.get(font)
+    if index is None:
+        index = _cache[font] = CmapIndex(font)
+    return index
+
+def set_mappings(font, mapping):
+    """Map codepoints to glyphs in every Unicode subtable that can hold them; drops the cached index.
+
+    Format 4 subtables only take BMP codepoints; when codepoints above
+    U+FFFF have no format 12/13 subtable to go to, a format 12 (3, 10)
+    subtable holding every Unicode mapping is added.
+    """
+    cmap = font['cmap']
+    unicode_tables = [table for table in cmap.tables if table.format != 14 and table.isUnicode()]
+    if any(cp > 0xFFFF for cp in mapping) and not any(table.format in (12, 13) for table in unicode_tables):
+        table = CmapSubtable.newSubtable(12)
+        table.platformID, table.platEncID, table.language = 3, 10, 0
+        # 先放入现有 BMP 映射，后面的循环再写入新映射
+        table.cmap = dict(cmap_index(font).mapping)
+        cmap.tables.append(table)
+        print("已添加 cmap 格式 12 子表以容纳 BMP 以外的码位")
+    for table in cmap.tables:
+        if table.format == 14 or not table.isUnicode():
+            continue
+        if table.format == 4:
+            table.cmap.update((cp, glyph_name) for cp, glyph_name in mapping.items() if cp <= 0xFFFF)
+        elif table.format in (12, 13):
+            table.cmap.update(mapping)
+    _cache.pop(font, None)
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("用法: python cmap_index.py <字体文件> <字符或码位...>")
+        print("例如: python cmap_index.py font.ttf 中 U+FF0C 0x2018")
+        sys.exit(1)
+
+    index = cmap_index(TTFont(sys.argv[1]))
+    codepoints = [ord(arg) if len(arg) == 1 else int(arg.replace('U+', ''), 16) for arg in sys.argv[2:]]
+    for cp, glyph_name in zip(codepoints, index.lookup(codepoints)):
+        others = [f"U+{other:04X}" for other in index.codepoints_for(glyph_name) if other != cp]
+        extra = f"（同一字形还映射: {' '.join(others)}）" if others else ""
+        print(f"U+{cp:04X} -> {glyph_name or '未映射'}{extra}")
@@ -0,0 +1,121 @@
+import sys
+from bisect import bisect_right
+
+class CodepointRanges:
+    """An immutable set of Unicode codepoints stored as sorted, disjoint inclusive intervals.
+
+    `U+0000-U+10FFFF` is one (start, end) pair instead of a million ints;
+    union, intersection and subtraction work interval by interval.
+    """
+
+    __slots__ = ('starts', 'ends')
+
+    def __init__(self, intervals=()):
+        starts, ends = [], []
+        for start, end in sorted(intervals):
+            if end < start:
+                continue
+            if ends and start <= ends[-1] + 1:
+                ends[-1] = max(ends[-1], end)
+            else:
+                starts.append(start)
+                ends.append(end)
+        self.starts = starts
+        self.ends = ends
+
+    @classmethod
+    def parse(cls, range_str):
+        """Parse a space separated range string.
+
+        Tokens: `U+4E00-U+9FFF`, `4E00-9FFF`, `0x0030-0x0039`, `U+4E00`, a single
+        character like `我`. A token prefixed with `!` (e.g. `!U+3000-U+303F`)
+        is excluded from the result instead of added.
+        """
+        include, exclude = [], []
+        for part in range_str.split():
+            target = include
+            if part.startswith('!') and len(part) > 1:
+                target, part = exclude, part[1:]
+            target.append(parse_token(part))
+        return cls(include) - cls(exclude)
+
+    def intervals(self):
+        return list(zip(self.starts, self.ends))
+
+    def __len__(self):
+        return sum(end - start + 1 for start, end in zip(self.starts, self.ends))
+
+    def __bool__(self):
+        return bool(self.starts)
+
+    def __contains__(self, codepoint):
+        i = bisect_right(self.starts, codepoint) - 1
+        return i >= 0 and codepoint <= self.ends[i]
+
+    def __eq__(self, other):
+        return isinstance(other, CodepointRanges) and self.starts == other.starts and self.ends == other.ends
+
+    def __repr__(self):
+        return f"CodepointRanges({format_ranges(self)!r})"
+
+    def __or__(self, other):
+        return CodepointRanges(self.intervals() + other.intervals())
+
+    def __and__(self, other):
+        result = []
+        i = j = 0
+        while i < len(self.starts) and j < len(other.starts):
+            start = max(self.starts[i], other.starts[j])
+            end = min(self.ends[i], other.ends[j])
+            if start <= end:
+                result.append((start, end))
+            if self.ends[i] < other.ends[j]:
+                i += 1
+            else:
+                j += 1
+        return CodepointRanges(result)
+
+    def __sub__(self, other):
+        result = []
+        j = 0
+        for start, end in zip(self.starts, self.ends):
+            while j < len(other.starts) and other.ends[j] < start:
+                j += 1
+            k = j
+            while start <= end and k < len(other.starts) and other.starts[k] <= end:
+                if other.starts[k] > start:
+                    result.append((start, other.starts[k] - 1))
+                start = max(start, other.ends[k] + 1)
+                k += 1
+            if start <= end:
+                result.append((start, end))
+        return CodepointRanges(result)
+
+def parse_token(part):
+    """Parse one `start-end` or single codepoint token into an inclusive (start, end) pair."""
+    if len(part) == 1:
+        return ord(part), ord(part)
+    if '-' in part:
+        start_str, end_str = part.replace('U+', '').replace('u+', '').split('-')
+        return int(start_str, 16), int(end_str, 16)
+    codepoint = int(part.replace('U+', '').replace('u+', ''), 16)
+    return codepoint, codepoint
+
+def format_ranges(ranges):
+    """Format ranges back into the `U+XXXX-U+YYYY` token syntax parse() accepts."""
+    tokens = []
+    for start, end in ranges.intervals():
+        tokens.append(f"U+{start:04X}" if start == end else f"U+{start:04X}-U+{end:04X}")
+    return ' '.join(tokens)
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("用法: python codepoint_ranges.py <Unicode范围> [排除范围]")
+        print("例如: python codepoint_ranges.py 'U+0000-U+10FFFF' 'U+D800-U+DFFF'")
+        sys.exit(1)
+
+    ranges = CodepointRanges.parse(sys.argv[1])
+    if len(sys.argv) > 2:
+        ranges -= CodepointRanges.parse(sys.argv[2])
+    print(format_ranges(ranges))
+    print(f"共 {len(ranges)} 个码位，{len(ranges.starts)} 个区间")
@@ -0,0 +1,211 @@
+import os
+import sys
+import json
+import mmap
+import time
+import sqlite3
+import hashlib
+from font_meta import FontMeta
+
+# 目录清单保存在各字体目录下的隐藏文件中
+CATALOG_FILE = '.font_catalog.db'
+FONT_EXTENSIONS = ('.ttf', '.ttc', '.otf')
+# 表结构变化时递增，旧清单会被重建
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fonts (
+    name TEXT PRIMARY KEY,
+    size INTEGER,
+    mtime_ns INTEGER,
+    sha256 TEXT,
+    members INTEGER,
+    upm INTEGER,
+    glyphs INTEGER,
+    weight INTEGER,
+    family TEXT,
+    subfamily TEXT,
+    full_name TEXT,
+    axes TEXT,
+    instances TEXT,
+    error TEXT
+)
+"""
+
+COLUMNS = ('name', 'size', 'mtime_ns', 'sha256', 'members', 'upm', 'glyphs', 'weight',
+           'family', 'subfamily', 'full_name', 'axes', 'instances', 'error')
+
+def file_sha256(path):
+    """SHA-256 of a file's content, read through mmap."""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return hashlib.sha256().hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return hashlib.sha256(data).hexdigest()
+
+def _name(font, name_id):
+    for record in font['name'].names:
+        if record.nameID == name_id:
+            try:
+                return record.toUnicode().strip()
+            except UnicodeDecodeError:
+                continue
+    return None
+
+def read_metadata(path):
+    """Catalog fields for one file from its header tables (first member of a TTC)."""
+    with FontMeta(path) as font:
+        fvar = font['fvar'] if 'fvar' in font else None
+        axes = [{'tag': axis.axisTag, 'min': axis.minValue, 'default': axis.defaultValue, 'max': axis.maxValue}
+                for axis in fvar.axes] if fvar else []
+        instances = [instance.coordinates for instance in fvar.instances] if fvar else []
+        return {
+            'members': font.member_count,
+            'upm': font['head'].unitsPerEm,
+            'glyphs': font['maxp'].numGlyphs,
+            'weight': font['OS/2'].usWeightClass if 'OS/2' in font else None,
+            'family': _name(font, 16) or _name(font, 1),
+            'subfamily': _name(font, 17) or _name(font, 2),
+            'full_name': _name(font, 4),
+            'axes': json.dumps(axes),
+            'instances': json.dumps(instances),
+            'error': None,
+        }
+
+def connect(directory='.'):
+    """Open (creating if needed) the catalog of a directory.
+
+    Falls back to an in-memory catalog when the directory is read-only,
+    so listings still work, just without persistence.
+    """
+    try:
+        db = sqlite3.connect(os.path.join(directory, CATALOG_FILE))
+        if db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            db.execute("DROP TABLE IF EXISTS fonts")
+            db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        db.execute(SCHEMA)
+    except sqlite3.Error:
+        db = sqlite3.connect(':memory:')
+        db.execute(SCHEMA)
+    db.row_factory = sqlite3.Row
+    return db
+
+def refresh(db, directory='.'):
+    """Bring the catalog in line with the font files in directory; returns (scanned, parsed, removed).
+
+    Files whose size and mtime are unchanged are skipped without being
+    opened. A changed file is hashed first and only re-parsed when its
+    content differs from the recorded hash.
+    """
+    known = {row['name']: row for row in db.execute("SELECT name, size, mtime_ns, sha256 FROM fonts")}
+    seen = set()
+    parsed = 0
+    with os.scandir(directory) as it:
+        for entry in it:
+            if not entry.name.lower().endswith(FONT_EXTENSIONS) or not entry.is_file():
+                continue
+            seen.add(entry.name)
+            stat = entry.stat()
+            row = known.get(entry.name)
+            if row and row['size'] == stat.st_size and row['mtime_ns'] == stat.st_mtime_ns:
+                continue
+            try:
+                digest = file_sha256(entry.path)
+            except OSError as e:
+                print(f"无法读取 {entry.name}: {e}")
+                continue
+            if row and row['sha256'] == digest:
+                # 内容未变（如被 touch 过），只更新时间戳
+                db.execute("UPDATE fonts SET size = ?, mtime_ns = ? WHERE name = ?",
+                           (stat.st_size, stat.st_mtime_ns, entry.name))
+                continue
+            try:
+                meta = read_metadata(entry.path)
+            except Exception as e:
+                # 无法解析的文件也记录下来，避免每次重复尝试
+                meta = {'error': str(e) or type(e).__name__}
+            meta.update(name=entry.name, size=stat.st_size, mtime_ns=stat.st_mtime_ns, sha256=digest)
+            db.execute(f"INSERT OR REPLACE INTO fonts ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                       [meta.get(column) for column in COLUMNS])
+            parsed += 1
+    removed = set(known) - seen
+    db.executemany("DELETE FROM fonts WHERE name = ?", [(name,) for name in removed])
+    db.commit()
+    return len(seen), parsed, len(removed)
+
+def entries(directory='.', extensions=FONT_EXTENSIONS):
+    """Refreshed catalog rows for the fonts in directory, newest first."""
+    with connect(directory) as db:
+        refresh(db, directory)
+        rows = db.execute("SELECT * FROM fonts ORDER BY mtime_ns DESC, name").fetchall()
+    db.close()
+    return [row for row in rows if row['name'].lower().endswith(tuple(extensions))]
+
+def font_files(directory='.', extensions=('.ttf',)):
+    """File names of the fonts in directory, newest first; replaces per-tool directory scans."""
+    return [row['name'] for row in entries(directory, extensions)]
+
+def query(directory='.', upm=None, variable=None, family=None):
+    """Catalog rows filtered by UPM, variable/static (True/False) and a family substring."""
+    result = []
+    for row in entries(directory):
+        if row['error']:
+            continue
+        if upm is not None and row['upm'] != upm:
+            continue
+        if variable is not None and bool(json.loads(row['axes'])) != variable:
+            continue
+        if family and family.lower() not in (row['family'] or '').lower():
+            continue
+        result.append(row)
+    return result
+
+def format_row(row):
+    """One listing line: name, UPM, glyph count, weight, axes and family."""
+    if row['error']:
+        return f"{row['name']}\t错误: {row['error']}"
+    axes = ' '.join(f"{axis['tag']}:{axis['min']:g}-{axis['max']:g}" for axis in json.loads(row['axes'])) or '-'
+    members = f"\t{row['members']} 个字体" if row['members'] > 1 else ''
+    return (f"{row['name']}\tUPM {row['upm']}\t字形 {row['glyphs']}\t字重 {row['weight'] or '-'}\t"
+            f"轴 {axes}\t{row['family'] or ''}{members}")
+
+def main():
+    usage = ("用法: python font_catalog.py refresh [目录]\n"
+             "       python font_catalog.py files [--ext=ttf,ttc] [--mtime]\n"
+             "       python font_catalog.py query [--upm=1000] [--vf|--static] [--family=名称] [--dir=目录]")
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    options = dict(arg[2:].split('=', 1) if '=' in arg else (arg[2:], '') for arg in sys.argv[1:] if arg.startswith('--'))
+    if not args:
+        print(usage)
+        sys.exit(1)
+    command = args[0]
+    directory = options.get('dir') or (args[1] if len(args) > 1 else '.')
+
+    if command == 'refresh':
+        start = time.time()
+        with connect(directory) as db:
+            scanned, parsed, removed = refresh(db, directory)
+        db.close()
+        print(f"共 {scanned} 个字体，重新读取 {parsed} 个，移除 {removed} 个，耗时: {time.time() - start:.2f}s")
+    elif command == 'files':
+        # 供 shell 脚本使用：每行一个文件名，按修改时间从新到旧
+        extensions = tuple('.' + ext.strip('.').lower() for ext in options.get('ext', 'ttf').split(','))
+        for row in entries(directory, extensions):
+            if 'mtime' in options:
+                mtime = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(row['mtime_ns'] / 1e9))
+                print(f"{row['name']}\t{mtime}")
+            else:
+                print(row['name'])
+    elif command == 'query':
+        variable = True if 'vf' in options else False if 'static' in options else None
+        upm = int(options['upm']) if options.get('upm') else None
+        rows = query(directory, upm=upm, variable=variable, family=options.get('family'))
+        for row in rows:
+            print(format_row(row))
+        print(f"共 {len(rows)} 个字体")
+    else:
+        print(usage)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import os
+import sys
+import mmap
+from fontTools.ttLib import newTable
+from sfnt_io import read_ttc_offsets, read_sfnt_directory
+
+# 只解析这些小表；其余表只记录位置，不读取
+META_TABLES = ('head', 'name', 'fvar', 'OS/2', 'maxp', 'hhea')
+
+class FontMeta:
+    """Header-only, read-only view of one font in a TTF/OTF/TTC file.
+
+    The file is memory-mapped and only the SFNT (or TTC) directory is parsed
+    up front; head, name, fvar, OS/2, maxp and hhea are decoded with
+    fontTools' table classes on first access. Supports the TTFont subset
+    that scanners need: `font[tag]`, `tag in font`, `keys()`,
+    `getTableData()`, `close()` and use as a context manager.
+    """
+
+    def __init__(self, path, font_number=0):
+        self.path = path
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < 12:
+                raise ValueError(f"{os.path.basename(path)}: 不是有效的字体文件")
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            offsets = read_ttc_offsets(self._data)
+            if not 0 <= font_number < len(offsets):
+                raise ValueError(f"{os.path.basename(path)}: 子字体编号 {font_number} 超出范围（共 {len(offsets)} 个）")
+            self.member_count = len(offsets)
+            self.sfntVersion, entries = read_sfnt_directory(self._data, offsets[font_number])
+        except Exception:
+            self._data.close()
+            raise
+        self._entries = {tag: (offset, length) for tag, offset, length in entries}
+        self._tables = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._data.close()
+
+    def keys(self):
+        return list(self._entries)
+
+    def __contains__(self, tag):
+        return tag in self._entries
+
+    def getTableData(self, tag):
+        offset, length = self._entries[tag]
+        return self._data[offset:offset + length]
+
+    def __getitem__(self, tag):
+        table = self._tables.get(tag)
+        if table is None:
+            if tag not in META_TABLES:
+                raise KeyError(f"FontMeta 不解析 {tag} 表，请使用 TTFont")
+            table = newTable(tag)
+            table.decompile(self.getTableData(tag), self)
+            self._tables[tag] = table
+        return table
+
+    def get(self, tag, default=None):
+        return self[tag] if tag in self else default
+
+def font_member_count(path):
+    """Number of fonts in a file: the TTC member count, or 1."""
+    with FontMeta(path) as font:
+        return font.member_count
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("用法: python font_meta.py <字体文件...>")
+        sys.exit(1)
+
+    for path in sys.argv[1:]:
+        try:
+            with FontMeta(path) as font:
+                name = next((record.toUnicode() for record in font['name'].names if record.nameID == 4), '')
+                axes = ' '.join(f"{axis.axisTag}:{axis.minValue:g}-{axis.maxValue:g}" for axis in font['fvar'].axes) \
+                    if 'fvar' in font else '-'
+                print(f"{path}\t{name}\tUPM {font['head'].unitsPerEm}\t字形 {font['maxp'].numGlyphs}\t"
+                      f"字重 {font['OS/2'].usWeightClass if 'OS/2' in font else '-'}\t轴 {axes}")
+        except Exception as e:
+            print(f"{path}\t错误: {e}")
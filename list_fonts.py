@@ -1,20 +1,17 @@
-import os
-from fontTools.ttLib import TTFont
+from font_meta import FontMeta
+from font_catalog import font_files
 
 def list_ttf_files():
     """列出当前文件夹内的所有TTF文件"""
-    ttf_files = [f for f in os.listdir('.') if f.endswith('.ttf')]
-    return ttf_files
+    return font_files('.')
 
-def get_variable_font_axes(ttf_file):
-    """获取可变字体的轴信息"""
-    font = TTFont(ttf_file)
+def get_variable_font_axes(font):
+    """获取可变字体的轴信息（font 为已打开的 FontMeta/TTFont）"""
     axes = font['fvar'].axes if 'fvar' in font else None
     return axes
 
-def get_font_instances(ttf_file):
-    """获取字体实例信息"""
-    font = TTFont(ttf_file)
+def get_font_instances(font):
+    """获取字体实例信息（font 为已打开的 FontMeta/TTFont）"""
     instances = font['fvar'].instances if 'fvar' in font else None
     return instances
 
@@ -62,11 +59,10 @@ def main():
         selected_file = ttf_files[choice_index]
         print(f"您选择的字体: {selected_file}")
         
-        axes = get_variable_font_axes(selected_file)
-        display_axes_info(axes)
-
-        instances = get_font_instances(selected_file)
-        display_instances_info(instances)
+        # 只打开一次，且只解析 fvar
+        with FontMeta(selected_file) as font:
+            display_axes_info(get_variable_font_axes(font))
+            display_instances_info(get_font_instances(font))
         
     except ValueError as e:
         print(f"错误: {e}")
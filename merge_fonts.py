@@ -2,116 +2,303 @@ import sys
 import traceback
 import os
 import time
+import struct
+import numpy as np
 from collections import deque
 from fontTools.ttLib import TTFont
+from fontTools.ttLib.tables._g_l_y_f import Glyph
+from scale_font import load_raw_glyf, scale_glyph_batch
+from codepoint_ranges import CodepointRanges, format_ranges
+from cmap_index import cmap_index, set_mappings
 
 def get_unicode_range(range_str):
-    """Parse a Unicode range string. Splits by space, supports formats like:
-    U+4E00-U+9FFF or 4E00-9FFF or single chars 'a', 'U+4E00', etc."""
-    codepoints = set()
-    parts = range_str.strip().split()
-    for part in parts:
-        part = part.strip()
-        if not part:
+    """Parse a Unicode range string into CodepointRanges. Splits by space, supports formats like:
+    U+4E00-U+9FFF or 4E00-9FFF or single chars 'a', 'U+4E00', etc.; '!' prefixed tokens are excluded."""
+    return CodepointRanges.parse(range_str)
+
+def unique_glyph_name(name, taken):
+    """Return name, or name#1, name#2... if it is already taken."""
+    candidate, n = name, 0
+    while candidate in taken:
+        n += 1
+        candidate = f"{name}#{n}"
+    return candidate
+
+def rename_components(glyphs, renamed):
+    """Point copied composites at the renamed copies of their components."""
+    if not renamed:
+        return
+    for glyph in glyphs:
+        if glyph.isComposite():
+            for comp in glyph.components:
+                comp.glyphName = renamed.get(comp.glyphName, comp.glyphName)
+
+def copy_glyphs_decoded(main_font, secondary_font, glyph_names, progress_interval=50, reserved=(), scale=1.0):
+    """Copy glyphs (and the components they reference) by decoding each one.
+
+    Names in `reserved` (glyphs an earlier source already copied) are not
+    overwritten; the copy gets a name#N name instead. Copied glyphs and
+    advances are rescaled by `scale` when the UPMs differ.
+    Returns {source name: name in main_font}.
+    """
+    main_glyf = main_font['glyf']
+    main_hmtx = main_font['hmtx'].metrics
+    sec_glyf = secondary_font['glyf']
+    sec_hmtx = secondary_font['hmtx'].metrics
+
+    # BFS approach to copy glyphs + dependencies
+    visited = set()
+    queue = deque(glyph_names)
+    copied = {}
+    renamed = {}
+    processed_count = 0
+
+    while queue:
+        glyph_name = queue.pop()
+        if glyph_name in visited:
             continue
-        if '-' in part:
-            start_str, end_str = part.replace('U+', '').split('-')
-            start = int(start_str, 16)
-            end = int(end_str, 16)
-            codepoints.update(range(start, end + 1))
+        visited.add(glyph_name)
+
+        # Copy glyph data
+        target = glyph_name
+        if glyph_name in reserved:
+            target = renamed[glyph_name] = unique_glyph_name(glyph_name, set(main_font.getGlyphOrder()))
+        if glyph_name in sec_glyf:
+            main_glyf[target] = sec_glyf[glyph_name]
+        if glyph_name in sec_hmtx:
+            main_hmtx[target] = sec_hmtx[glyph_name]
+        copied[glyph_name] = target
+        processed_count += 1
+
+        # Print progress every N glyphs
+        if processed_count % progress_interval == 0:
+            print(f"已处理 {processed_count} 个字形...")
+
+        # If it's composite, enqueue dependencies
+        glyph_obj = sec_glyf[glyph_name]
+        if hasattr(glyph_obj, 'components') and glyph_obj.components:
+            for comp in glyph_obj.components:
+                if comp.glyphName not in visited:
+                    queue.appendleft(comp.glyphName)
+
+    glyphs = [sec_glyf[name] for name in copied if name in sec_glyf]
+    rename_components(glyphs, renamed)
+    if scale != 1:
+        scale_glyph_batch(glyphs, scale)
+        for glyph in glyphs:
+            if glyph.isComposite():
+                glyph.recalcBounds(main_glyf)
+        scale_imported_metrics(main_font, list(copied.values()), scale)
+    return copied
+
+def copy_glyphs_raw(main_font, secondary_font, glyph_names, progress_interval=1000, reserved=(), scale=1.0):
+    """Copy compiled glyph records from secondary_font into main_font without decoding them.
+
+    Simple glyphs are sliced straight out of the secondary glyf/loca and stay
+    compiled through save; only composites are decoded so their component
+    names can be followed and remapped to the main font's glyph IDs. maxp and
+    the head bbox are widened from the raw glyph headers, since the font is
+    saved with recalcBBoxes off. Names in `reserved` are renamed as in
+    copy_glyphs_decoded.
+
+    When scale != 1 (the fonts' UPMs differ) the imported simple glyphs are
+    decoded and rescaled together in one batch, along with component
+    offsets and advances. Returns {source name: name in main_font}.
+    """
+    main_glyf = main_font['glyf']
+    main_hmtx = main_font['hmtx'].metrics
+    # glyf.__setitem__ scans the glyph order list on every insert; track it in a set instead
+    main_order = main_glyf.glyphOrder
+    main_names = set(main_order)
+    sec_hmtx = secondary_font['hmtx'].metrics
+    sec_order = secondary_font.getGlyphOrder()
+    sec_ids = {name: gid for gid, name in enumerate(sec_order)}
+    glyf_data, offsets = load_raw_glyf(secondary_font)
+    maxp = main_font['maxp']
+    head = main_font['head']
+    bounds = [head.xMin, head.yMin, head.xMax, head.yMax]
+    sec_glyf = None
+
+    # 按辅助字体的字形顺序追加，输出的字形顺序才是确定的
+    visited = set()
+    queue = deque(sorted(glyph_names, key=lambda name: sec_ids.get(name, -1)))
+    copied = {}
+    renamed = {}
+    composites = []
+    rescaled = []
+    processed_count = 0
+    while queue:
+        glyph_name = queue.popleft()
+        if glyph_name in visited or glyph_name not in sec_ids:
+            continue
+        visited.add(glyph_name)
+
+        gid = sec_ids[glyph_name]
+        data = glyf_data[offsets[gid]:offsets[gid + 1]]
+        num_contours = struct.unpack_from(">h", data)[0] if len(data) >= 10 else 0
+        if num_contours < 0:
+            # 组合字形需要解码，组件引用按字形名重新映射到主字体的 ID
+            if sec_glyf is None:
+                sec_glyf = secondary_font['glyf']
+            glyph = sec_glyf[glyph_name]
+            composites.append(glyph)
+            rescaled.append(glyph)
+            points, contours, depth = glyph.getCompositeMaxpValues(sec_glyf)
+            maxp.maxCompositePoints = max(maxp.maxCompositePoints, points)
+            maxp.maxCompositeContours = max(maxp.maxCompositeContours, contours)
+            maxp.maxComponentDepth = max(maxp.maxComponentDepth, depth)
+            maxp.maxComponentElements = max(maxp.maxComponentElements, len(glyph.components))
+            if hasattr(glyph, 'program'):
+                maxp.maxSizeOfInstructions = max(maxp.maxSizeOfInstructions, len(glyph.program.getBytecode()))
+            for comp in glyph.components:
+                if comp.glyphName not in visited:
+                    queue.append(comp.glyphName)
         else:
-            part = part.replace('U+', '')
-            if len(part) == 1:
-                codepoints.add(ord(part))
-            else:
-                codepoints.add(int(part, 16))
-    return codepoints
-
-def merge_fonts(main_font_path, secondary_font_path, unicode_range):
-    """Merge glyphs from secondary_font into main_font for given codepoints, showing progress."""
+            glyph = Glyph(data)
+            if num_contours > 0 and scale != 1:
+                glyph.expand(main_glyf)
+                rescaled.append(glyph)
+            if num_contours > 0:
+                points, instructions = struct.unpack_from(">HH", data, 10 + 2 * (num_contours - 1))
+                maxp.maxPoints = max(maxp.maxPoints, points + 1)
+                maxp.maxContours = max(maxp.maxContours, num_contours)
+                maxp.maxSizeOfInstructions = max(maxp.maxSizeOfInstructions, instructions)
+        if num_contours and scale == 1:
+            x_min, y_min, x_max, y_max = struct.unpack_from(">hhhh", data, 2)
+            bounds = [min(bounds[0], x_min), min(bounds[1], y_min), max(bounds[2], x_max), max(bounds[3], y_max)]
+
+        target = glyph_name
+        if glyph_name in reserved:
+            target = renamed[glyph_name] = unique_glyph_name(glyph_name, main_names)
+        main_glyf.glyphs[target] = glyph
+        if target not in main_names:
+            main_names.add(target)
+            main_order.append(target)
+        if glyph_name in sec_hmtx:
+            main_hmtx[target] = sec_hmtx[glyph_name]
+        copied[glyph_name] = target
+        processed_count += 1
+        if processed_count % progress_interval == 0:
+            print(f"已处理 {processed_count} 个字形...")
+
+    rename_components(composites, renamed)
+    if scale != 1:
+        # UPM 不同：只缩放导入的字形，整批一次乘法取整
+        scale_glyph_batch(rescaled, scale)
+        for glyph in composites:
+            glyph.recalcBounds(main_glyf)
+        for glyph in rescaled:
+            bounds = [min(bounds[0], glyph.xMin), min(bounds[1], glyph.yMin),
+                      max(bounds[2], glyph.xMax), max(bounds[3], glyph.yMax)]
+        scale_imported_metrics(main_font, list(copied.values()), scale)
+    head.xMin, head.yMin, head.xMax, head.yMax = bounds
+    return copied
+
+def scale_imported_metrics(main_font, glyph_names, scale):
+    """Rescale the advances of freshly imported glyphs; lsb follows the new xMin."""
+    main_glyf = main_font['glyf']
+    main_hmtx = main_font['hmtx'].metrics
+    names = [name for name in glyph_names if name in main_hmtx]
+    if not names:
+        return
+    metrics = np.array([main_hmtx[name] for name in names], dtype=np.float64)
+    metrics = np.floor(metrics * scale + 0.5).astype(int).tolist()
+    for name, (advance, lsb) in zip(names, metrics):
+        glyph = main_glyf.glyphs[name]
+        if getattr(glyph, 'numberOfContours', 0) and hasattr(glyph, 'xMin'):
+            lsb = glyph.xMin
+        main_hmtx[name] = (advance, lsb)
+
+def resolve_sources(sources, exclude):
+    """Decide which source wins each codepoint; earlier sources take priority.
+
+    sources is a list of (font, CodepointRanges). Returns one {codepoint: (source index, glyph name)}
+    index built from each source's cmap intersected with its ranges.
+    """
+    winners = {}
+    for index, (font, ranges) in enumerate(sources):
+        glyph_set = set(font.getGlyphOrder())
+        for cp, gname in cmap_index(font).select(ranges - exclude).items():
+            if gname in glyph_set and cp not in winners:
+                winners[cp] = (index, gname)
+    return winners
+
+def merge_sources(main_font_path, sources, raw=True, exclude_range=''):
+    """Merge several fallback fonts into main_font in one pass and save once.
+
+    sources is an ordered list of (font path, range string); when ranges
+    overlap the earlier source wins the codepoint. Each input is loaded
+    once, glyphs and their component closures are copied per source, and a
+    glyph name already taken by an earlier source is renamed (name#1).
+
+    By default glyph records are copied compiled (see copy_glyphs_raw); raw=False
+    keeps the old path that decodes every copied glyph.
+    """
     try:
         start_time = time.time()
 
         # Load fonts
         main_font = TTFont(main_font_path)
-        secondary_font = TTFont(secondary_font_path)
+        loaded = []
+        for font_path, range_str in sources:
+            ranges = get_unicode_range(range_str)
+            print(f"{os.path.basename(font_path)} 合并范围: {format_ranges(ranges) or '无'} （共 {len(ranges)} 个码位）")
+            loaded.append((TTFont(font_path), ranges))
+        exclude = get_unicode_range(exclude_range)
+        if exclude_range:
+            print(f"排除范围: {format_ranges(exclude)}")
 
-        # Convert range to a set of codepoints
-        codepoints = get_unicode_range(unicode_range)
-        if not codepoints:
-            print("未指定有效的合并范围，退出。")
+        # Only codepoints a source actually maps, resolved once across all sources
+        winners = resolve_sources(loaded, exclude)
+        if not winners:
+            print("未指定有效的合并范围，或辅助字体中没有对应字符，退出。")
             return
+        print(f"辅助字体中已映射的字符数: {len(winners)}")
 
-        print(f"合并范围: {hex(min(codepoints))} 到 {hex(max(codepoints))} （共 {len(codepoints)} 个字符）")
+        main_upm = main_font['head'].unitsPerEm
+        progress_interval = 50
+        copy_glyphs = copy_glyphs_raw if raw else copy_glyphs_decoded
+        reserved = set()
+        processed_count = 0
 
-        # Cache tables for speed
-        main_glyf = main_font['glyf']
-        main_hmtx = main_font['hmtx'].metrics
-        sec_glyf = secondary_font['glyf']
-        sec_hmtx = secondary_font['hmtx'].metrics
+        by_source = [{} for _ in loaded]
+        for cp, (winner, gname) in winners.items():
+            by_source[winner][cp] = gname
 
-        sec_best_cmap = secondary_font['cmap'].getBestCmap()
-        main_best_cmap = main_font['cmap'].getBestCmap()
+        for index, (font, _) in enumerate(loaded):
+            selected = by_source[index]
+            if not selected:
+                continue
+            glyphs_to_merge = set(selected.values())
+            print(f"\n[{index + 1}/{len(loaded)}] {os.path.basename(sources[index][0])}: "
+                  f"{len(selected)} 个字符，需要处理的字形数: {len(glyphs_to_merge)}")
 
-        # Collect glyphs to merge
-        glyphs_to_merge = set()
-        for cp in codepoints:
-            gname = sec_best_cmap.get(cp)
-            if gname and gname in sec_glyf:
-                glyphs_to_merge.add(gname)
+            source_upm = font['head'].unitsPerEm
+            scale = main_upm / source_upm
+            if scale != 1:
+                print(f"UPM 不同 ({source_upm} -> {main_upm})，导入的字形和步进宽度按 {scale:.4f} 缩放")
 
-        print(f"需要处理的字形数: {len(glyphs_to_merge)}")
+            copied = copy_glyphs(main_font, font, glyphs_to_merge, reserved=reserved, scale=scale)
+            renamed = sum(1 for name, target in copied.items() if name != target)
+            if renamed:
+                print(f"有 {renamed} 个字形与前面的字体重名，已重命名")
+            reserved.update(copied.values())
+            processed_count += len(copied)
 
-        # BFS approach to copy glyphs + dependencies
-        visited = set()
-        queue = deque(glyphs_to_merge)
-        processed_count = 0
-        progress_interval = 50
+            # Update cmap for the mapped codepoints (every Unicode subtable, not just the best one)
+            set_mappings(main_font, {cp: copied[gname] for cp, gname in selected.items()})
+            print(f"已更新 {len(selected)} 个 codepoint 映射")
 
-        while queue:
-            glyph_name = queue.pop()
-            if glyph_name in visited:
-                continue
-            visited.add(glyph_name)
-
-            # Copy glyph data
-            if glyph_name in sec_glyf:
-                main_glyf[glyph_name] = sec_glyf[glyph_name]
-            if glyph_name in sec_hmtx:
-                main_hmtx[glyph_name] = sec_hmtx[glyph_name]
-            processed_count += 1
-
-            # Print progress every N glyphs
-            if processed_count % progress_interval == 0:
-                print(f"已处理 {processed_count} 个字形...")
-
-            # If it's composite, enqueue dependencies
-            glyph_obj = sec_glyf[glyph_name]
-            if hasattr(glyph_obj, 'components') and glyph_obj.components:
-                for comp in glyph_obj.components:
-                    if comp.glyphName not in visited:
-                        queue.appendleft(comp.glyphName)
-
-        # Update cmap for all codepoints, show progress
-        print("\n更新 CMap...")
-        cmap_count = 0
-        for cp in codepoints:
-            gname = sec_best_cmap.get(cp)
-            if gname:
-                main_best_cmap[cp] = gname
-            cmap_count += 1
-            if cmap_count % progress_interval == 0:
-                print(f"已更新 {cmap_count} / {len(codepoints)} 个 codepoint 映射...")
-
-        # Copy .notdef if present
-        if '.notdef' in sec_glyf:
-            main_glyf['.notdef'] = sec_glyf['.notdef']
+        # Copy .notdef from the highest priority source if present
+        notdef_font = loaded[0][0]
+        if '.notdef' in notdef_font.getGlyphOrder():
+            copy_glyphs(main_font, notdef_font, ['.notdef'], scale=main_upm / notdef_font['head'].unitsPerEm)
             print("已复制 .notdef 字形")
 
         # Save output
         base_main_name = os.path.splitext(os.path.basename(main_font_path))[0]
-        base_secondary_name = os.path.splitext(os.path.basename(secondary_font_path))[0]
-        output_file = f'合并完成_{base_main_name}_{base_secondary_name}.ttf'
+        base_source_names = '_'.join(os.path.splitext(os.path.basename(path))[0] for path, _ in sources)
+        output_file = f'合并完成_{base_main_name}_{base_source_names}.ttf'
         # log before saving
         print(f"\n保存合并后文件中...")
         # main_font.save(output_file)
@@ -132,10 +319,23 @@ def merge_fonts(main_font_path, secondary_font_path, unicode_range):
         print(f"发生错误：{e}")
         traceback.print_exc()
 
+def merge_fonts(main_font_path, secondary_font_path, unicode_range, raw=True, exclude_range=''):
+    """Merge glyphs from secondary_font into main_font for given codepoints, showing progress."""
+    merge_sources(main_font_path, [(secondary_font_path, unicode_range)], raw, exclude_range)
+
 if __name__ == "__main__":
-    if len(sys.argv) != 4:
-        print("用法: python merge_fonts.py <主字体路径> <辅助字体路径> <Unicode范围>")
+    raw = '--decode' not in sys.argv
+    exclude_range = ' '.join(arg.split('=', 1)[1] for arg in sys.argv[1:] if arg.startswith('--exclude='))
+    args = [arg for arg in sys.argv[1:] if arg != '--decode' and not arg.startswith('--exclude=')]
+    if len(args) < 3 or len(args) % 2 == 0:
+        print("用法: python merge_fonts.py <主字体路径> <辅助字体1> <Unicode范围1> [<辅助字体2> <Unicode范围2> ...] [--exclude=范围] [--decode]")
         print("例如: python merge_fonts.py main.ttf secondary.ttf 'U+4E00-U+9FFF'")
+        print("      python merge_fonts.py main.ttf latin.ttf 'U+0000-U+024F' cjk.ttf 'U+3000-U+9FFF' symbols.ttf 'U+2000-U+2BFF'")
+        print("      python merge_fonts.py main.ttf secondary.ttf 'U+0000-U+10FFFF' --exclude='U+0000-U+007F'")
+        print("  排在前面的辅助字体优先：范围重叠时使用先列出的字体中的字形")
+        print("  范围中以 ! 开头的项同样表示排除，如 'U+2000-U+206F !U+2018-U+2019'")
+        print("  --decode  逐个解码字形复制（旧方式，较慢）")
         sys.exit(1)
 
-    merge_fonts(sys.argv[1], sys.argv[2], sys.argv[3])
\ No newline at end of file
+    sources = list(zip(args[1::2], args[2::2]))
+    merge_sources(args[0], sources, raw, exclude_range)
@@ -0,0 +1,197 @@
+import os
+import sys
+import json
+import time
+from fontTools.ttLib import TTFont
+from fontTools.misc import sstruct
+from fontTools.ttLib.tables import O_S_2f_2, _h_h_e_a, _p_o_s_t, _v_h_e_a
+from scale_font import raw_table
+from sfnt_io import save_font
+
+# 各厂商系统字体的度量值（适用于 UPM 1000 的字体）
+PROFILES = {
+    'huawei': {
+        'OS/2': {
+            'sCapHeight': 700, 'usWinAscent': 928, 'usWinDescent': 244,
+            'sTypoAscender': 850, 'sTypoDescender': -150, 'sTypoLineGap': 172, 'sxHeight': 500,
+            'ySubscriptXSize': 650, 'ySubscriptYSize': 600, 'ySubscriptXOffset': 0, 'ySubscriptYOffset': 75,
+            'ySuperscriptXSize': 650, 'ySuperscriptYSize': 600, 'ySuperscriptXOffset': 0, 'ySuperscriptYOffset': 350,
+            'yStrikeoutSize': 50, 'yStrikeoutPosition': 300,
+        },
+        'hhea': {'ascent': 928, 'descent': -244},
+        'post': {'underlinePosition': -207},
+        'vhea': {'ascent': 500, 'descent': -500, 'lineGap': 0},
+    },
+    'xiaomi': {
+        'OS/2': {
+            'sCapHeight': 740, 'usWinAscent': 1044, 'usWinDescent': 282,
+            'sTypoAscender': 890, 'sTypoDescender': -110, 'sTypoLineGap': 326, 'sxHeight': 530,
+            'ySubscriptXSize': 650, 'ySubscriptYSize': 600, 'ySubscriptXOffset': 0, 'ySubscriptYOffset': 75,
+            'ySuperscriptXSize': 650, 'ySuperscriptYSize': 600, 'ySuperscriptXOffset': 0, 'ySuperscriptYOffset': 350,
+            'yStrikeoutSize': 50, 'yStrikeoutPosition': 265,
+        },
+        'hhea': {'ascent': 1044, 'descent': -282},
+        'post': {'underlinePosition': -100},
+        'vhea': {'ascent': 500, 'descent': -500, 'lineGap': 1000},
+    },
+    'oppo': {
+        'OS/2': {
+            'sCapHeight': 725, 'usWinAscent': 1048, 'usWinDescent': 271,
+            'sTypoAscender': 1048, 'sTypoDescender': -271, 'sTypoLineGap': 0, 'sxHeight': 518,
+            'ySubscriptXSize': 650, 'ySubscriptYSize': 600, 'ySubscriptXOffset': 0, 'ySubscriptYOffset': 75,
+            'ySuperscriptXSize': 650, 'ySuperscriptYSize': 600, 'ySuperscriptXOffset': 0, 'ySuperscriptYOffset': 350,
+            'yStrikeoutSize': 50, 'yStrikeoutPosition': 310,
+        },
+        'hhea': {'ascent': 928, 'descent': -244},
+        'post': {'underlinePosition': -75},
+        'vhea': {'ascent': 500, 'descent': -500, 'lineGap': 1000},
+    },
+    'honor': {
+        'OS/2': {
+            'sCapHeight': 880, 'usWinAscent': 914, 'usWinDescent': 301,
+            'sTypoAscender': 1047, 'sTypoDescender': -270, 'sTypoLineGap': 0, 'sxHeight': 600,
+            'ySubscriptXSize': 500, 'ySubscriptYSize': 500, 'ySubscriptXOffset': 0, 'ySubscriptYOffset': 62,
+            'ySuperscriptXSize': 500, 'ySuperscriptYSize': 500, 'ySuperscriptXOffset': 0, 'ySuperscriptYOffset': 500,
+            'yStrikeoutSize': 45, 'yStrikeoutPosition': 250,
+        },
+        'hhea': {'ascent': 1047, 'descent': -270},
+        'post': {'underlinePosition': -70},
+        'vhea': {'ascent': 500, 'descent': -500, 'lineGap': 0},
+    },
+    'vivo': {
+        'OS/2': {
+            'sCapHeight': 709, 'usWinAscent': 928, 'usWinDescent': 244,
+            'sTypoAscender': 850, 'sTypoDescender': -150, 'sTypoLineGap': 0, 'sxHeight': 505,
+            'ySubscriptXSize': 500, 'ySubscriptYSize': 500, 'ySubscriptXOffset': 0, 'ySubscriptYOffset': 62,
+            'ySuperscriptXSize': 500, 'ySuperscriptYSize': 500, 'ySuperscriptXOffset': 0, 'ySuperscriptYOffset': 500,
+            'yStrikeoutSize': 45, 'yStrikeoutPosition': 250,
+        },
+        'hhea': {'ascent': 928, 'descent': -244},
+        'post': {'underlinePosition': -100},
+        'vhea': {'ascent': 500, 'descent': -500, 'lineGap': 0},
+    },
+}
+
+PROFILE_LABELS = {
+    'huawei': '华为度量',
+    'xiaomi': '小米度量',
+    'oppo': 'oppo度量',
+    'honor': '荣耀度量',
+    'vivo': 'vivo度量',
+}
+
+# 只改表头的定长字段；OS/2 的字段集合随版本增长
+OS2_FORMATS = {0: O_S_2f_2.OS2_format_0, 1: O_S_2f_2.OS2_format_1, 2: O_S_2f_2.OS2_format_2,
+               3: O_S_2f_2.OS2_format_2, 4: O_S_2f_2.OS2_format_2, 5: O_S_2f_2.OS2_format_5}
+HEADER_FORMATS = {'hhea': _h_h_e_a.hheaFormat, 'post': _p_o_s_t.postFormat, 'vhea': _v_h_e_a.vheaFormat}
+METRIC_TABLES = ('OS/2', 'hhea', 'post', 'vhea')
+
+def table_format(tag, data):
+    """Return the sstruct header format of a metric table's compiled bytes."""
+    if tag == 'OS/2':
+        version = int.from_bytes(data[:2], 'big')
+        return OS2_FORMATS.get(version, O_S_2f_2.OS2_format_5)
+    return HEADER_FORMATS[tag]
+
+def load_profile(name):
+    """Return (name, profile) for a built-in profile name or a custom JSON file path.
+
+    A custom profile has the same shape as PROFILES entries:
+    {"OS/2": {"usWinAscent": 1000, ...}, "hhea": {...}, "post": {...}, "vhea": {...}}
+    """
+    if name in PROFILES:
+        return name, PROFILES[name]
+    if not os.path.isfile(name):
+        raise ValueError(f"未知的度量配置: {name}（可用: {', '.join(PROFILES)}，或自定义 JSON 文件）")
+    with open(name, encoding='utf-8') as f:
+        profile = json.load(f)
+    for tag, fields in profile.items():
+        if tag not in METRIC_TABLES:
+            raise ValueError(f"{name}: 不支持的表 {tag}（可用: {', '.join(METRIC_TABLES)}）")
+        known = sstruct.getformat(O_S_2f_2.OS2_format_5 if tag == 'OS/2' else HEADER_FORMATS[tag])[1]
+        unknown = [field for field in fields if field not in known]
+        if unknown:
+            raise ValueError(f"{name}: {tag} 表没有字段 {', '.join(unknown)}")
+    return os.path.splitext(os.path.basename(name))[0], profile
+
+def patch_table(tag, data, fields):
+    """Rewrite the header fields of one compiled metric table; the bytes after the header are kept."""
+    fmt = table_format(tag, data)
+    size = sstruct.calcsize(fmt)
+    header = sstruct.unpack(fmt, data[:size])
+    # 旧版本 OS/2 没有的字段（如 v0/v1 的 sCapHeight）直接忽略，与 fontTools 编译时一致
+    header.update((field, value) for field, value in fields.items() if field in header)
+    return sstruct.pack(fmt, header) + data[size:]
+
+def apply_profile(font, profile, original=None):
+    """Install the profile's metric tables into font as raw compiled tables.
+
+    original maps tag -> compiled bytes to patch; by default the font's current data is used.
+    """
+    for tag in METRIC_TABLES:
+        if tag not in profile or tag not in font:
+            continue
+        data = original[tag] if original else font.getTableData(tag)
+        font[tag] = raw_table(tag, patch_table(tag, data, profile[tag]))
+
+def write_variants(input_ttf, variants):
+    """Load input_ttf once and write one output per (profile, output path) pair.
+
+    Every table other than OS/2/hhea/post/vhea is written from the original
+    compiled bytes; only the small metric table headers are rebuilt per
+    variant. Returns the list of outputs written.
+    """
+    start = time.time()
+    font = TTFont(input_ttf)
+    original = {tag: font.getTableData(tag) for tag in METRIC_TABLES if tag in font}
+    print(f"字体加载耗时: {time.time() - start:.2f}s")
+
+    written = []
+    for profile, output_ttf in variants:
+        step = time.time()
+        apply_profile(font, profile, original)
+        # 其余表未解析，按原字节直接写出；head 的修改时间也保持不变
+        save_font(font, output_ttf)
+        written.append(output_ttf)
+        print(f"已保存: {output_ttf} ({time.time() - step:.2f}s)")
+    font.close()
+    print(f"共生成 {len(written)} 个文件，总耗时: {time.time() - start:.2f}s")
+    return written
+
+def modify_metrics(input_ttf, output_ttf, profile_name):
+    """Apply one metric profile to input_ttf and save it as output_ttf. Returns True on success."""
+    try:
+        _, profile = load_profile(profile_name)
+        write_variants(input_ttf, [(profile, output_ttf)])
+        return True
+    except Exception as e:
+        print(f"错误: {e}")
+        return False
+
+def main():
+    if len(sys.argv) < 2:
+        print("用法: python metric_profiles.py <输入TTF文件> [配置...]")
+        print(f"  配置: {' '.join(PROFILES)}、all（全部厂商）或自定义 JSON 文件路径，默认 all")
+        print("  例如: python metric_profiles.py font.ttf huawei xiaomi my_metrics.json")
+        sys.exit(1)
+
+    input_ttf = sys.argv[1]
+    names = sys.argv[2:] or ['all']
+    if 'all' in names:
+        names = [name for name in names if name != 'all'] + [name for name in PROFILES if name not in names]
+
+    base_dir = os.path.dirname(input_ttf)
+    base_name = os.path.basename(input_ttf)
+    variants = []
+    try:
+        for name in names:
+            profile_name, profile = load_profile(name)
+            label = PROFILE_LABELS.get(profile_name, profile_name)
+            variants.append((profile, os.path.join(base_dir, f"{label}_{base_name}")))
+        write_variants(input_ttf, variants)
+    except Exception as e:
+        print(f"错误: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
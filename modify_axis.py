@@ -1,10 +1,24 @@
 import os
+import sys
+import mmap
+import time
+from collections import Counter
 from fontTools.ttLib import TTFont
+from fontTools.ttLib.tables import TupleVariation as tv
+from fontTools.ttLib.tables._g_v_a_r import compileGlyph_, decompileGlyph_
+from fontTools.varLib import instancer
+from sfnt_io import save_font, read_sfnt_directory
+from font_meta import FontMeta
+from font_catalog import font_files
+from scale_font import build_gvar, raw_table, raw_glyph_bounds
+
+# 每批解码的字形数：只有这一批的 gvar 变体和展开的轮廓同时留在内存中
+CHUNK_SIZE = 1000
 
 def get_variable_font_axes(ttf_file):
     """获取可变字体的轴信息"""
-    font = TTFont(ttf_file)
-    axes = font['fvar'].axes if 'fvar' in font else None
+    with FontMeta(ttf_file) as font:
+        axes = font['fvar'].axes if 'fvar' in font else None
     return axes
 
 def modify_font_axes(font, axis_tag, new_min, new_max, new_default):
@@ -17,10 +31,145 @@ def modify_font_axes(font, axis_tag, new_min, new_max, new_default):
                 axis.defaultValue = new_default  # defaultValue保持不变
                 print(f"已修改母版轴 '{axis_tag}' 的值为: 最小值 {new_min}, 最大值 {new_max}, 默认值 {new_default}")
 
+def component_depths(font):
+    """Nesting depth of every composite glyph; simple glyphs are left out (depth 0)."""
+    glyf = font['glyf']
+    glyph_order = font.getGlyphOrder()
+    # 从字形头判断是否为组合字形，只展开组合字形
+    _, _, is_composite = raw_glyph_bounds(font)
+    composites = {glyph_order[gid] for gid in is_composite.nonzero()[0]}
+    depths = {}
+
+    def depth(name):
+        if name not in composites:
+            return 0
+        if name not in depths:
+            depths[name] = 1 + max(depth(component.glyphName) for component in glyf[name].components)
+        return depths[name]
+
+    for name in composites:
+        depth(name)
+    return depths
+
+def limit_gvar(font, normalized_limits, chunk_size=CHUNK_SIZE):
+    """Limit glyf/gvar to the new axis ranges chunk by chunk and store gvar as compiled bytes.
+
+    Same per-glyph work as instancer.instantiateGvar (deltas outside the
+    range dropped, the rest renormalized, the default outline moved and
+    IUP-optimized), but each chunk's variations are compiled with embedded
+    peaks and its outlines compacted before the next chunk is decoded. Peak
+    tuples are then moved to the shared tuple list in a second pass over the
+    compiled bytes, one glyph at a time.
+    """
+    gvar = font['gvar']
+    glyf = font['glyf']
+    h_metrics = font['hmtx'].metrics
+    v_metrics = getattr(font.get('vmtx'), 'metrics', None)
+    axis_tags = [axis.axisTag for axis in font['fvar'].axes]
+    glyph_order = font.getGlyphOrder()
+    # 与 instantiateGvar 相同：组合字形排在它引用的字形之后
+    depths = component_depths(font)
+    names = sorted(glyph_order, key=lambda name: (depths.get(name, 0), name))
+
+    compiled = {}
+    point_counts = {}
+    peaks = Counter()
+    for start in range(0, len(names), chunk_size):
+        chunk = names[start:start + chunk_size]
+        for name in chunk:
+            instancer._instantiateGvarGlyph(name, glyf, gvar, h_metrics, v_metrics, normalized_limits)
+            variations = gvar.variations.pop(name, None)
+            if not variations:
+                compiled[name] = b""
+                continue
+            point_counts[name] = gvar.getNumPoints_(glyf[name])
+            peaks.update(var.compileCoord(axis_tags) for var in variations)
+            compiled[name] = compileGlyph_(variations, point_counts[name], axis_tags, {})
+        for name in chunk:
+            glyf[name].compact(glyf, recalcBBoxes=False)
+
+    shared = [coord for coord, count in sorted(peaks.most_common(tv.TUPLE_INDEX_MASK + 1),
+                                               key=lambda item: (-item[1], item[0])) if count > 1]
+    if shared:
+        indices = {coord: i for i, coord in enumerate(shared)}
+        for name, point_count in point_counts.items():
+            variations = decompileGlyph_(point_count, [], axis_tags, compiled[name])
+            compiled[name] = compileGlyph_(variations, point_count, axis_tags, indices)
+    pieces = [compiled[name] for name in glyph_order]
+    if not any(pieces):
+        del font['gvar']
+        return
+    font['gvar'] = raw_table('gvar', build_gvar(len(axis_tags), len(shared), b"".join(shared), pieces))
+
+def limit_axis_ranges(font, limits, chunk_size=CHUNK_SIZE):
+    """Restrict axes to {tag: (min, default, max)} and drop the variation data outside them.
+
+    Unlike modify_font_axes this moves the default master when the default
+    changes and rewrites gvar, cvar, HVAR/VVAR, MVAR, GDEF/GPOS, avar, STAT
+    and fvar for the new design space; gvar is handled in chunks of
+    chunk_size glyphs to keep memory bounded on large CJK fonts.
+    """
+    axis_limits = instancer.AxisLimits(limits).limitAxesAndPopulateDefaults(font)
+    normalized_limits = axis_limits.normalize(font)
+    if 'gvar' in font:
+        limit_gvar(font, normalized_limits, chunk_size)
+    # gvar 已处理完毕，暂时移出（同时从 reader 中删除，避免 instancer 重新读取原表），其余表交给 instancer
+    gvar = font['gvar'] if 'gvar' in font else None
+    if gvar is not None:
+        del font['gvar']
+    instancer.instantiateVariableFont(font, limits, inplace=True)
+    if gvar is not None:
+        font['gvar'] = gvar
+
+def table_sizes(path):
+    """{tag: length} from a font file's table directory."""
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        return {tag: length for tag, _, length in read_sfnt_directory(data)[1]}
+
+def report_sizes(before, after):
+    """Print the size of every table that changed, plus the total."""
+    print(f"{'表':<6}{'修改前':>12}{'修改后':>12}{'变化':>12}")
+    for tag in sorted(set(before) | set(after)):
+        old, new = before.get(tag, 0), after.get(tag, 0)
+        if old != new:
+            print(f"{tag:<6}{old:>12,}{new:>12,}{new - old:>+12,}")
+    old, new = sum(before.values()), sum(after.values())
+    print(f"{'总计':<6}{old:>12,}{new:>12,}{new - old:>+12,} ({(new - old) / max(old, 1):+.1%})")
+
+def limit_axis_file(input_path, output_path, limits, chunk_size=CHUNK_SIZE):
+    """Write a copy of a VF limited to the given axis ranges and print the size change per table."""
+    start = time.time()
+    font = TTFont(input_path)
+    if 'fvar' not in font:
+        raise ValueError(f"{os.path.basename(input_path)} 不是可变字体")
+    axes = {axis.axisTag: axis for axis in font['fvar'].axes}
+    for tag, (new_min, new_default, new_max) in limits.items():
+        if tag not in axes:
+            raise ValueError(f"字体没有 {tag} 轴")
+        if not axes[tag].minValue <= new_min < new_max <= axes[tag].maxValue:
+            raise ValueError(f"{tag} 轴的新范围 {new_min}-{new_max} 无效（原范围 {axes[tag].minValue}-{axes[tag].maxValue}）；"
+                             f"固定为单个值请使用 vf_instancer.py")
+        if not new_min <= new_default <= new_max:
+            raise ValueError(f"{tag} 轴的默认值 {new_default} 不在 {new_min}-{new_max} 内")
+    limit_axis_ranges(font, limits, chunk_size)
+    save_font(font, output_path)
+    font.close()
+    report_sizes(table_sizes(input_path), table_sizes(output_path))
+    print(f"耗时: {time.time() - start:.2f}s")
+
+def parse_limit(text, axis):
+    """'300:700' or '300:400:700' -> (min, default, max); a default outside the range is clamped."""
+    values = [float(value) for value in text.split(':')]
+    if len(values) == 2:
+        new_min, new_max = values
+        return new_min, min(max(axis.defaultValue, new_min), new_max), new_max
+    if len(values) == 3:
+        return tuple(values)
+    raise ValueError(f"无效的范围: {text}")
+
 def list_ttf_files():
     """列出当前文件夹内的所有 TTF 文件"""
-    ttf_files = [f for f in os.listdir('.') if f.endswith('.ttf')]
-    return ttf_files
+    return font_files('.')
 
 def main():
     ttf_files = list_ttf_files()
@@ -59,6 +208,17 @@ def main():
 
             # 直接选择第一个轴进行修改
             axis_tag_to_modify = axes[0].axisTag  
+
+            mode = input("请选择模式: 1) 仅修改 fvar 数值  2) 限制轴范围并裁剪变体数据（减小文件）[1]: ")
+            if mode == '2':
+                text = input(f"请输入新的范围 最小值:最大值 或 最小值:默认值:最大值 (当前: {axes[0].minValue:g}:{axes[0].defaultValue:g}:{axes[0].maxValue:g}): ")
+                try:
+                    limits = {axis_tag_to_modify: parse_limit(text, axes[0])}
+                    limit_axis_file(ttf_file, '限制轴范围_' + ttf_file, limits)
+                    print(f"已保存修改后的字体为: 限制轴范围_{ttf_file}")
+                except ValueError as e:
+                    print(f"错误: {e}")
+                continue
             
             # 输入新的最小值、最大值和默认值
             new_min_value = input(f"请输入新的最小值 (当前值: {axes[0].minValue}): ") or axes[0].minValue
@@ -69,10 +229,33 @@ def main():
 
             # 保存修改后的字体
             modified_file_name = '修改母版度量_' + ttf_file
-            font.save(modified_file_name)
+            # 只重写 fvar 表，其余表按原字节写出
+            save_font(font, modified_file_name)
             print(f"已保存修改后的字体为: {modified_file_name}")
         else:
             print("该字体不是可变字体,无法进行修改。")
 
 if __name__ == '__main__':
-    main()
+    if len(sys.argv) > 1:
+        if len(sys.argv) < 3:
+            print("用法: python modify_axis.py <可变字体.ttf> <轴>=<最小值>:[默认值:]<最大值> [...] [输出文件]")
+            sys.exit(1)
+        input_path = sys.argv[1]
+        specs = [arg for arg in sys.argv[2:] if '=' in arg]
+        outputs = [arg for arg in sys.argv[2:] if '=' not in arg]
+        output_path = outputs[0] if outputs else '限制轴范围_' + os.path.basename(input_path)
+        try:
+            axes = {axis.axisTag: axis for axis in get_variable_font_axes(input_path) or []}
+            limits = {}
+            for spec in specs:
+                tag, text = spec.split('=', 1)
+                if tag not in axes:
+                    raise ValueError(f"字体没有 {tag} 轴")
+                limits[tag] = parse_limit(text, axes[tag])
+            limit_axis_file(input_path, output_path, limits)
+        except ValueError as e:
+            print(f"错误: {e}")
+            sys.exit(1)
+        print(f"已保存: {output_path}")
+    else:
+        main()
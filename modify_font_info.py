@@ -1,4 +1,5 @@
 from fontTools.ttLib import TTFont
+from sfnt_io import save_font
 import sys
 import os
 
@@ -103,7 +104,8 @@ def modify_font_info(input_path):
                 base_name = os.path.basename(input_path).replace('.ttf', '').replace('.otf', '')
                 dir_name = os.path.dirname(input_path)
                 output_path = os.path.join(dir_name, f"信息修改_{base_name}.ttf")
-                font.save(output_path)
+                # 只重写 name 表，其余表按原字节写出
+                save_font(font, output_path)
                 print(f"\n字体已保存为: {output_path}")
                 return
             elif 1 <= choice <= len(records):
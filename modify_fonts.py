@@ -1,9 +1,11 @@
 import os
 from fontTools.ttLib import TTFont
+from sfnt_io import save_font
+from font_catalog import font_files
 
 def list_ttf_files():
     """列出当前文件夹内所有 TTF 文件"""
-    return [f for f in os.listdir() if f.lower().endswith('.ttf')]
+    return font_files('.')
 
 def modify_font_info(file_path, new_version, new_subfamily):
     """修改字体文件中的版本信息和唯一子家族标识"""
@@ -16,9 +18,9 @@ def modify_font_info(file_path, new_version, new_subfamily):
         elif name_record.nameID == 3:
             name_record.string = new_subfamily.encode('utf-16-be')
 
-    # 保存为新文件
+    # 保存为新文件：只重写 name 表，其余表按原字节写出
     new_file_name = f"改字体信息_{os.path.basename(file_path)}"
-    font.save(new_file_name)
+    save_font(font, new_file_name)
     print(f"已保存为: {new_file_name}")
 
 def main():
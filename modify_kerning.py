@@ -1,60 +1,352 @@
+import os
 import sys
-from fontTools.ttLib import TTFont
+import json
+import time
+import numpy as np
+import multiprocessing as mp
+from fontTools.ttLib import TTFont, newTable
+from fontTools.ttLib.tables import otTables
+from fontTools.otlLib import builder as otl
+from cmap_index import cmap_index
+from codepoint_ranges import CodepointRanges
+from scale_font import raw_glyph_bounds, update_font_bounds
+from sfnt_io import save_font
+
+# 默认规则：引号步进宽度 -40，英文标点 -20（字体单位）
+DEFAULT_RULES = {
+    'rules': [
+        {'name': '引号', 'chars': '\'"‘’“”', 'advance': -40},
+        {'name': '英文标点', 'chars': ',.;:!?', 'advance': -20},
+    ],
+}
+RULE_TARGETS = ('advance', 'lsb', 'rsb')
+OUTPUT_PREFIX = '标点间距_'
 
 def get_glyph_name_for_unicode(font, unicode_value):
     """Get glyph name for a unicode value"""
-    try:
-        for table in font['cmap'].tables:
-            if unicode_value in table.cmap:
-                return table.cmap[unicode_value]
-    except TypeError:
-        print(f"警告: 无法处理 Unicode {hex(unicode_value)}")
-    return None
-
-def modify_glyph_width(font, unicode_value, width_adjustment):
+    return cmap_index(font).glyph(unicode_value)
+
+def modify_glyph_width(font, unicode_value, width_adjustment, glyph_name=None):
     """Modify the advance width of a glyph"""
-    glyph_name = get_glyph_name_for_unicode(font, unicode_value)
+    glyph_name = glyph_name or get_glyph_name_for_unicode(font, unicode_value)
     if glyph_name and glyph_name in font['hmtx'].metrics:
         advance, lsb = font['hmtx'].metrics[glyph_name]
         font['hmtx'].metrics[glyph_name] = (advance + width_adjustment, lsb)
 
+def load_rules(path=None):
+    """Return the spacing rules from a JSON file, or DEFAULT_RULES when path is None.
+
+    {"units_per_em": 1000, "feature": "kern",
+     "rules": [{"name": "引号", "chars": "‘’“”", "advance": -40},
+               {"name": "全角标点", "ranges": "U+3001-U+3002 U+FF0C", "lsb": 50, "rsb": 50}]}
+
+    advance is added to the advance width; lsb/rsb are target sidebearings
+    measured from the outline bbox. With units_per_em the values are scaled
+    to each font's UPM, otherwise they are font units. A glyph hit by
+    several rules follows the first one.
+    """
+    if path is None:
+        return DEFAULT_RULES
+    with open(path, encoding='utf-8') as f:
+        config = json.load(f)
+    rules = config.get('rules')
+    if not isinstance(rules, list) or not rules:
+        raise ValueError(f"{path}: 缺少 rules 列表")
+    for i, rule in enumerate(rules, start=1):
+        name = rule.get('name', f"规则{i}")
+        if not rule.get('chars') and not rule.get('ranges'):
+            raise ValueError(f"{path}: {name} 需要 chars 或 ranges")
+        if not any(target in rule for target in RULE_TARGETS):
+            raise ValueError(f"{path}: {name} 需要 advance、lsb 或 rsb 中的至少一项")
+        if 'advance' in rule and 'rsb' in rule:
+            raise ValueError(f"{path}: {name} 的 advance 与 rsb 不能同时指定")
+    return config
+
+def rule_ranges(rule):
+    """Codepoints a rule applies to: its `ranges` string plus its `chars`."""
+    chars = CodepointRanges((ord(ch), ord(ch)) for ch in rule.get('chars', ''))
+    return CodepointRanges.parse(rule.get('ranges', '')) | chars
+
+def resolve_targets(font, config):
+    """Collect per-glyph targets for every rule in one set of arrays.
+
+    Returns glyph IDs, an (n, 3) float array of advance delta / lsb target /
+    rsb target (NaN where a rule leaves it alone) and per-rule glyph counts.
+    """
+    index = cmap_index(font)
+    glyph_map = font.getReverseGlyphMap()
+    upm_scale = font['head'].unitsPerEm / config['units_per_em'] if config.get('units_per_em') else 1.0
+    glyph_ids, targets, counts = [], [], []
+    claimed = set()
+    for i, rule in enumerate(config['rules'], start=1):
+        row = [rule.get(target, np.nan) * upm_scale for target in RULE_TARGETS]
+        gids = sorted({glyph_map[name] for name in index.select(rule_ranges(rule)).values()} - claimed)
+        claimed.update(gids)
+        glyph_ids.extend(gids)
+        targets.extend([row] * len(gids))
+        counts.append((rule.get('name', f"规则{i}"), len(gids)))
+    targets = np.floor(np.array(targets, dtype=np.float64).reshape(-1, 3) + 0.5)
+    return np.array(glyph_ids, dtype=np.int64), targets, counts
+
+def compute_spacing(advances, bounds, has_outline, targets):
+    """Return the per-glyph outline shift and new advance for the given targets, as int arrays."""
+    advance_delta, lsb_target, rsb_target = targets.T
+    x_min, x_max = bounds[:, 0], bounds[:, 2]
+    # 空字形（如空格）没有边界，只能调整步进宽度
+    shift = np.where(has_outline & ~np.isnan(lsb_target), lsb_target - x_min, 0)
+    new_advance = np.where(has_outline & ~np.isnan(rsb_target), x_max + shift + rsb_target, advances + shift)
+    new_advance = new_advance + np.nan_to_num(advance_delta)
+    return shift.astype(np.int64), np.maximum(new_advance, 0).astype(np.int64)
+
+def shift_outlines(font, shifts, is_composite):
+    """Move glyph outlines horizontally by {glyph name: shift}.
+
+    Composite glyphs that use a moved glyph as a component get the opposite
+    offset so they keep their look. Returns the names of composite glyphs
+    left in place because none of their components has an x offset.
+    """
+    glyf = font['glyf']
+    glyph_order = font.getGlyphOrder()
+    skipped = []
+    for name, shift in shifts.items():
+        glyph = glyf[name]
+        if glyph.isComposite():
+            # 按锚点对齐的组件（firstPt/secondPt）没有 x，跟随锚点移动
+            offset_components = [component for component in glyph.components if hasattr(component, 'x')]
+            if not offset_components:
+                skipped.append(name)
+                continue
+            for component in offset_components:
+                component.x += shift
+        else:
+            glyph.coordinates.translate((shift, 0))
+        glyph.xMin += shift
+        glyph.xMax += shift
+    shifts = {name: shift for name, shift in shifts.items() if name not in skipped}
+    for gid in np.flatnonzero(is_composite):
+        glyph = glyf[glyph_order[gid]]
+        for component in glyph.components:
+            shift = shifts.get(component.glyphName)
+            if not shift or not hasattr(component, 'x'):
+                continue
+            transform = getattr(component, 'transform', [[1, 0], [0, 1]])
+            component.x -= round(shift * transform[0][0])
+            component.y -= round(shift * transform[0][1])
+    return skipped
+
+def add_single_pos(font, values, feature_tag):
+    """Add one GPOS lookup applying {glyph name: (x placement, x advance)} under feature_tag.
+
+    Glyphs with equal values share a SinglePos format 1 subtable. The lookup
+    joins an existing feature with that tag, or a new feature registered in
+    every script and language system.
+    """
+    mapping = {}
+    for name, (placement, advance) in values.items():
+        fields = {key: int(value) for key, value in (('XPlacement', placement), ('XAdvance', advance)) if value}
+        if fields:
+            mapping[name] = otl.buildValue(fields)
+    if not mapping:
+        return 0
+    lookup = otl.buildLookup(otl.buildSinglePos(mapping, font.getReverseGlyphMap()))
+
+    if 'GPOS' not in font:
+        font['GPOS'] = gpos = newTable('GPOS')
+        gpos.table = otTables.GPOS()
+        gpos.table.Version = 0x00010000
+        gpos.table.ScriptList = otTables.ScriptList()
+        gpos.table.ScriptList.ScriptRecord = []
+        gpos.table.FeatureList = otTables.FeatureList()
+        gpos.table.FeatureList.FeatureRecord = []
+        gpos.table.LookupList = otTables.LookupList()
+        gpos.table.LookupList.Lookup = []
+        # 沿用 GSUB 的脚本列表，没有时只登记 DFLT 和 latn
+        script_tags = ['DFLT', 'latn']
+        if 'GSUB' in font and font['GSUB'].table.ScriptList:
+            script_tags = [record.ScriptTag for record in font['GSUB'].table.ScriptList.ScriptRecord] or script_tags
+        for tag in script_tags:
+            record = otTables.ScriptRecord()
+            record.ScriptTag = tag
+            record.Script = otTables.Script()
+            record.Script.DefaultLangSys = otTables.LangSys()
+            record.Script.DefaultLangSys.ReqFeatureIndex = 0xFFFF
+            record.Script.DefaultLangSys.FeatureIndex = []
+            record.Script.LangSysRecord = []
+            gpos.table.ScriptList.ScriptRecord.append(record)
+    table = font['GPOS'].table
+    table.LookupList.Lookup.append(lookup)
+    lookup_index = len(table.LookupList.Lookup) - 1
+
+    features = table.FeatureList.FeatureRecord
+    lang_systems = []
+    for record in table.ScriptList.ScriptRecord:
+        if record.Script.DefaultLangSys:
+            lang_systems.append(record.Script.DefaultLangSys)
+        lang_systems.extend(lang.LangSys for lang in record.Script.LangSysRecord)
+
+    existing = [i for i, record in enumerate(features) if record.FeatureTag == feature_tag]
+    if existing:
+        for i in existing:
+            features[i].Feature.LookupListIndex.append(lookup_index)
+            features[i].Feature.LookupCount = len(features[i].Feature.LookupListIndex)
+        feature_index = existing[0]
+    else:
+        # FeatureRecord 按标签排序，插入后其后的索引都要加一
+        feature_index = sum(1 for record in features if record.FeatureTag < feature_tag)
+        record = otTables.FeatureRecord()
+        record.FeatureTag = feature_tag
+        record.Feature = otTables.Feature()
+        record.Feature.FeatureParams = None
+        record.Feature.LookupListIndex = [lookup_index]
+        record.Feature.LookupCount = 1
+        features.insert(feature_index, record)
+        for lang_sys in lang_systems:
+            lang_sys.FeatureIndex = [i + (i >= feature_index) for i in lang_sys.FeatureIndex]
+            if lang_sys.ReqFeatureIndex != 0xFFFF and lang_sys.ReqFeatureIndex >= feature_index:
+                lang_sys.ReqFeatureIndex += 1
+        variations = getattr(table, 'FeatureVariations', None)
+        if variations:
+            for variation in variations.FeatureVariationRecord:
+                for substitution in variation.FeatureTableSubstitution.SubstitutionRecord:
+                    substitution.FeatureIndex += substitution.FeatureIndex >= feature_index
+    table.FeatureList.FeatureCount = len(features)
+    for lang_sys in lang_systems:
+        if not any(features[i].FeatureTag == feature_tag for i in lang_sys.FeatureIndex):
+            lang_sys.FeatureIndex = sorted(lang_sys.FeatureIndex + [feature_index])
+        lang_sys.FeatureCount = len(lang_sys.FeatureIndex)
+    return len(mapping)
+
+def adjust_spacing(font, config, gpos=False):
+    """Apply spacing rules to a loaded font.
+
+    Sidebearings of all target glyphs are computed at once from the raw glyph
+    headers. By default hmtx and the outlines are changed; with gpos=True the
+    same adjustment is written as a GPOS single positioning lookup and the
+    glyphs are left untouched. Returns per-rule glyph counts.
+    """
+    glyph_ids, targets, counts = resolve_targets(font, config)
+    if not len(glyph_ids):
+        return counts
+    glyph_order = font.getGlyphOrder()
+    names = [glyph_order[gid] for gid in glyph_ids]
+    hmtx = font['hmtx'].metrics
+    advances = np.array([hmtx[name][0] for name in names], dtype=np.int64)
+
+    if 'glyf' in font:
+        bounds, has_outline, is_composite = raw_glyph_bounds(font)
+    else:
+        # CFF 字体没有可直接读取的字形头，只调整步进宽度
+        if not np.isnan(targets[:, 1:]).all():
+            print("警告: 非 TrueType 轮廓，忽略 lsb/rsb 规则")
+        bounds = np.zeros((len(glyph_order), 4), dtype=np.int64)
+        has_outline = is_composite = np.zeros(len(glyph_order), dtype=bool)
+    shift, new_advance = compute_spacing(advances, bounds[glyph_ids], has_outline[glyph_ids], targets)
+
+    if gpos:
+        values = {name: (s, a - old) for name, s, a, old in
+                  zip(names, shift.tolist(), new_advance.tolist(), advances.tolist())}
+        add_single_pos(font, values, config.get('feature', 'kern'))
+        return counts
+
+    if 'glyf' in font:
+        moved = shift != 0
+        if moved.any():
+            name_array = np.array(names, dtype=object)
+            skipped = shift_outlines(font, dict(zip(name_array[moved], shift[moved].tolist())), is_composite)
+            if skipped:
+                # 未平移的字形保持原 lsb，步进宽度扣除未生效的平移量
+                print(f"警告: {len(skipped)} 个复合字形的组件均按锚点对齐，无法平移: {', '.join(skipped)}")
+                stuck = np.isin(name_array, skipped)
+                new_advance[stuck] = np.maximum(new_advance[stuck] - shift[stuck], 0)
+                shift[stuck] = 0
+                moved = shift != 0
+            bounds[glyph_ids[moved], 0] += shift[moved]
+            bounds[glyph_ids[moved], 2] += shift[moved]
+    for name, s, advance in zip(names, shift.tolist(), new_advance.tolist()):
+        hmtx[name] = (advance, hmtx[name][1] + s)
+    if 'glyf' in font:
+        # 只改被移动的目标字形的 lsb，其余字形的 hmtx 保持原样；head/hhea 范围整体重算
+        update_font_bounds(font, bounds, has_outline, glyph_ids[moved])
+        font.recalcBBoxes = False
+    return counts
+
+def process_file(task):
+    """Adjust one font file; returns (input, output, rule counts, seconds, error message)."""
+    input_ttf, output_ttf, config, gpos = task
+    start = time.time()
+    try:
+        font = TTFont(input_ttf)
+        counts = adjust_spacing(font, config, gpos)
+        save_font(font, output_ttf)
+        font.close()
+        return input_ttf, output_ttf, counts, time.time() - start, None
+    except Exception as e:
+        return input_ttf, output_ttf, [], time.time() - start, str(e)
+
+def report(result):
+    input_ttf, output_ttf, counts, elapsed, error = result
+    if error:
+        print(f"失败: {input_ttf}: {error}")
+        return
+    summary = '，'.join(f"{name} {count} 个字形" for name, count in counts)
+    print(f"{os.path.basename(output_ttf)}: {summary} ({elapsed:.2f}s)")
+
+def process_directory(directory, config, gpos=False, jobs=None):
+    """Adjust every TTF in directory in parallel, writing 标点间距_<name> next to each."""
+    files = sorted(f for f in os.listdir(directory)
+                   if f.lower().endswith('.ttf') and not f.startswith(OUTPUT_PREFIX))
+    if not files:
+        print("目录中没有 ttf 文件。")
+        return []
+    tasks = [(os.path.join(directory, f), os.path.join(directory, OUTPUT_PREFIX + f), config, gpos) for f in files]
+    jobs = max(1, min(jobs or mp.cpu_count(), len(tasks)))
+    print(f"共 {len(tasks)} 个字体，使用 {jobs} 个进程")
+
+    start = time.time()
+    results = []
+    if jobs > 1:
+        with mp.Pool(jobs) as pool:
+            for result in pool.imap_unordered(process_file, tasks):
+                report(result)
+                results.append(result)
+    else:
+        for task in tasks:
+            result = process_file(task)
+            report(result)
+            results.append(result)
+    failed = sum(1 for result in results if result[4])
+    print(f"\n完成 {len(results) - failed} 个，失败 {failed} 个，总耗时: {time.time() - start:.2f}s")
+    return results
+
 def main():
-    if len(sys.argv) != 3:
-        print("用法: python modify_kerning.py <输入TTF文件> <输出TTF文件>")
+    options = [arg for arg in sys.argv[1:] if arg.startswith('--')]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    if not args or (not os.path.isdir(args[0]) and len(args) != 2):
+        print("用法: python modify_kerning.py <输入TTF文件> <输出TTF文件> [--rules=规则.json] [--gpos]")
+        print("      python modify_kerning.py <目录> [--rules=规则.json] [--gpos] [--jobs=N]")
+        print("  --rules  JSON 规则文件（按码位集合指定 advance 增量、lsb/rsb 目标），默认只收窄引号和英文标点")
+        print("  --gpos   以 GPOS 单字定位写入调整，不改动字形和 hmtx")
+        sys.exit(1)
+
+    settings = dict(option[2:].split('=', 1) if '=' in option else (option[2:], True) for option in options)
+    try:
+        config = load_rules(settings.get('rules'))
+    except (OSError, ValueError) as e:
+        print(f"错误: {e}")
         sys.exit(1)
+    gpos = bool(settings.get('gpos'))
 
-    input_ttf = sys.argv[1]
-    output_ttf = sys.argv[2]
-    
-    font = TTFont(input_ttf)
-    
-    # Unicode values for quotes and punctuation
-    quotes = [
-        0x0027,  # ' APOSTROPHE
-        0x0022,  # " QUOTATION MARK
-        0x2018,  # ' LEFT SINGLE QUOTATION MARK
-        0x2019,  # ' RIGHT SINGLE QUOTATION MARK
-        0x201C,  # " LEFT DOUBLE QUOTATION MARK
-        0x201D,  # " RIGHT DOUBLE QUOTATION MARK
-    ]
-    
-    punctuation = [
-        0x002C,  # , COMMA
-        0x002E,  # . FULL STOP
-        0x003B,  # ; SEMICOLON
-        0x003A,  # : COLON
-        0x0021,  # ! EXCLAMATION MARK
-        0x003F,  # ? QUESTION MARK
-    ]
-    
-    # Adjust width for each character
-    for unicode_value in quotes:
-        modify_glyph_width(font, unicode_value, -40)
-    for unicode_value in punctuation:
-        modify_glyph_width(font, unicode_value, -20)
-        
-    font.save(output_ttf)
+    if os.path.isdir(args[0]):
+        jobs = int(settings['jobs']) if 'jobs' in settings else None
+        results = process_directory(args[0], config, gpos, jobs)
+        sys.exit(1 if any(result[4] for result in results) else 0)
+
+    input_ttf, output_ttf = args
+    result = process_file((input_ttf, output_ttf, config, gpos))
+    report(result)
+    if result[4]:
+        sys.exit(1)
     print(f"字体'{input_ttf}'已修改字符宽度，并保存为'{output_ttf}'。")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,100 @@
+import os
+import sys
+import json
+import shutil
+import hashlib
+import tempfile
+import PIL
+
+# 缓存目录与容量可用环境变量覆盖
+CACHE_DIR = os.environ.get('MTZ_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'font-tools', 'mtz'))
+CACHE_MAX_BYTES = int(float(os.environ.get('MTZ_CACHE_MAX_MB', '256')) * 1024 * 1024)
+# 渲染结果取决于这些模块的代码，改动后旧缓存自动失效
+RENDER_MODULES = ('mtz_description.py', 'mtz_logo.py', 'mtz_preview.py')
+
+def tool_version():
+    """Hash of the renderer sources plus the Pillow version."""
+    digest = hashlib.sha256(PIL.__version__.encode())
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    for name in RENDER_MODULES:
+        with open(os.path.join(base_dir, name), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def cache_key(font_data, sample_text, params):
+    """Key for one set of artifacts: font bytes, preview text, render params and tool version."""
+    digest = hashlib.sha256()
+    for part in (hashlib.sha256(font_data).digest(), sample_text.encode('utf-8'),
+                 json.dumps(params, sort_keys=True).encode(), tool_version().encode()):
+        digest.update(len(part).to_bytes(8, 'big'))
+        digest.update(part)
+    return digest.hexdigest()
+
+def load(key, cache_dir=CACHE_DIR):
+    """Return {artifact name: bytes} for a cached key, or None. A hit marks the entry as recently used."""
+    entry = os.path.join(cache_dir, key)
+    try:
+        artifacts = {}
+        for name in os.listdir(entry):
+            with open(os.path.join(entry, name), 'rb') as f:
+                artifacts[name] = f.read()
+        os.utime(entry)
+        return artifacts
+    except OSError:
+        return None
+
+def store(key, artifacts, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+    """Save {artifact name: bytes} under key, then evict least recently used entries over max_bytes."""
+    os.makedirs(cache_dir, exist_ok=True)
+    temp_dir = tempfile.mkdtemp(dir=cache_dir, prefix='.tmp-')
+    for name, data in artifacts.items():
+        with open(os.path.join(temp_dir, name), 'wb') as f:
+            f.write(data)
+    try:
+        # 目录重命名是原子的；其他进程已写入同一个键时保留对方的结果
+        os.rename(temp_dir, os.path.join(cache_dir, key))
+    except OSError:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    evict(cache_dir, max_bytes)
+
+def entries(cache_dir=CACHE_DIR):
+    """Return [(last used time, size in bytes, path)] for every cache entry, oldest first."""
+    result = []
+    if not os.path.isdir(cache_dir):
+        return result
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if name.startswith('.') or not os.path.isdir(path):
+            continue
+        try:
+            size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+            result.append((os.path.getmtime(path), size, path))
+        except OSError:
+            continue
+    return sorted(result)
+
+def evict(cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+    """Delete least recently used entries until the cache fits in max_bytes; returns bytes freed."""
+    cached = entries(cache_dir)
+    total = sum(size for _, size, _ in cached)
+    freed = 0
+    for _, size, path in cached:
+        if total - freed <= max_bytes:
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        freed += size
+    return freed
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else 'stats'
+    if command == 'clear':
+        freed = evict(max_bytes=0)
+        print(f"已清空缓存，释放 {freed / 1024 / 1024:.1f} MB")
+    elif command == 'stats':
+        cached = entries()
+        total = sum(size for _, size, _ in cached)
+        print(f"缓存目录: {CACHE_DIR}")
+        print(f"共 {len(cached)} 项，{total / 1024 / 1024:.1f} MB / 上限 {CACHE_MAX_BYTES / 1024 / 1024:.0f} MB")
+    else:
+        print("用法: python mtz_cache.py [stats|clear]")
+        sys.exit(1)
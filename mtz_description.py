@@ -1,7 +1,8 @@
+import io
 import os
 import sys
 import xml.etree.ElementTree as ET
-from fontTools.ttLib import TTFont, TTCollection
+from font_meta import FontMeta
 
 NAME_ID_MEANINGS = {
     0: "Copyright",
@@ -29,14 +30,8 @@ NAME_ID_MEANINGS = {
 }
 
 def get_tt_object(font_path, font_index=0):
-    """Return a TTFont object from TTC or TTF."""
-    with open(font_path, 'rb') as f:
-        signature = f.read(4)
-    if signature == b'ttcf':
-        ttc = TTCollection(font_path)
-        return ttc.fonts[font_index]
-    else:
-        return TTFont(font_path)
+    """Return a header-only FontMeta (name/fvar/head/OS/2) for a TTC member or TTF."""
+    return FontMeta(font_path, font_index)
 
 def get_name_record(tt, name_id):
     """Return the string for nameID if found, otherwise empty."""
@@ -57,14 +52,12 @@ def get_font_weight_range(tt):
                 return ",".join(str(x) for x in range(int(axis.minValue), int(axis.maxValue)+100, 100))
     return "150,200,250,300,350,400,450,500,550,600,650,700"
 
-def generate_description_xml(font_path, output_file="description.xml", font_index=0):
-    """Generate description.xml for a given TTF/TTC, saving to 'output_file'."""
-    tt = get_tt_object(font_path, font_index)
-
+def build_description_xml(tt, default_name):
+    """Return description.xml as UTF-8 bytes for an already loaded font."""
     version_str = get_name_record(tt, 5) or "1.00"
     author_str = get_name_record(tt, 9) or "UnknownAuthor"
     designer_str = get_name_record(tt, 8) or "UnknownDesigner"
-    full_name_str = get_name_record(tt, 4) or os.path.splitext(os.path.basename(font_path))[0]
+    full_name_str = get_name_record(tt, 4) or default_name
 
     if version_str.lower().startswith("version "):
         version_str = version_str[8:].strip()
@@ -113,8 +106,17 @@ def generate_description_xml(font_path, output_file="description.xml", font_inde
         # Pretty-print for Python 3.9+
         ET.indent(theme, space="    ")
 
-    tree = ET.ElementTree(theme)
-    tree.write(output_file, encoding="UTF-8", xml_declaration=True)
+    buffer = io.BytesIO()
+    ET.ElementTree(theme).write(buffer, encoding="UTF-8", xml_declaration=True)
+    return buffer.getvalue()
+
+def generate_description_xml(font_path, output_file="description.xml", font_index=0):
+    """Generate description.xml for a given TTF/TTC, saving to 'output_file'."""
+    default_name = os.path.splitext(os.path.basename(font_path))[0]
+    with get_tt_object(font_path, font_index) as tt:
+        xml = build_description_xml(tt, default_name)
+    with open(output_file, 'wb') as f:
+        f.write(xml)
     print(f"Generated description XML: {output_file}")
 
 if __name__ == "__main__":
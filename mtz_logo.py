@@ -1,24 +1,26 @@
 from PIL import Image, ImageDraw, ImageFont
+import io
 import sys
 import os
+from mtz_preview import subset_font_data
 
-def create_logo(text, font_path, output_filename="preview_fonts_small_0.png"):
+LOGO_SUFFIX = "VF"
+
+def render_logo(text, font_data, font_index=0):
+    """Draw the logo image from font bytes; returns a PIL Image."""
     # Fixed dimensions
     WIDTH = 1080
     HEIGHT = 155
     FONT_SIZE = int(HEIGHT * 0.8)  # 80% of height for larger words
     
-    if not os.path.exists(font_path):
-        raise FileNotFoundError(f"Font not found: {font_path}")
-    
     # Create transparent canvas
     img = Image.new('RGBA', (WIDTH, HEIGHT), (255, 255, 255, 0))
     draw = ImageDraw.Draw(img)
-    font = ImageFont.truetype(font_path, FONT_SIZE)
+    font = ImageFont.truetype(io.BytesIO(font_data), FONT_SIZE, index=font_index)
     
     # Calculate positions
     text_width = font.getlength(text)
-    vf_width = font.getlength("VF")
+    vf_width = font.getlength(LOGO_SUFFIX)
     total_width = text_width + vf_width + 20  # 20px spacing
     
     # Center text
@@ -27,8 +29,16 @@ def create_logo(text, font_path, output_filename="preview_fonts_small_0.png"):
     
     # Draw text
     draw.text((start_x, y_position), text, fill='black', font=font)
-    draw.text((start_x + text_width + 20, y_position), "VF", fill='red', font=font)
+    draw.text((start_x + text_width + 20, y_position), LOGO_SUFFIX, fill='red', font=font)
     
+    return img
+
+def create_logo(text, font_path, output_filename="preview_fonts_small_0.png"):
+    if not os.path.exists(font_path):
+        raise FileNotFoundError(f"Font not found: {font_path}")
+    with open(font_path, 'rb') as f:
+        font_data = f.read()
+    img = render_logo(text, subset_font_data(font_data, text + LOGO_SUFFIX))
     img.save(output_filename, "PNG")
     return output_filename
 
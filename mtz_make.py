@@ -1,27 +1,26 @@
+import io
 import sys
 import os
+import glob
+import time
 import zipfile
-import tempfile
-import shutil
-from mtz_description import generate_description_xml
-from mtz_logo import create_logo
-from mtz_preview import create_preview
-from fontTools.ttLib import TTFont, TTCollection
+import multiprocessing as mp
+import mtz_cache
+from mtz_description import build_description_xml, get_name_record
+from mtz_logo import render_logo, LOGO_SUFFIX
+from mtz_preview import render_preview, missing_characters, preview_text, subset_font_data
+from fontTools.ttLib import TTFont
+from font_meta import FontMeta
+from memory_info import available_memory
+
+# 参与缓存键的渲染参数
+RENDER_PARAMS = {'jpeg_quality': 95}
 
 def get_full_font_name(font_path, font_index=0):
     """Detect if font_path is TTC or TTF by reading its file header, then return the font's full name."""
-    with open(font_path, 'rb') as f:
-        signature = f.read(4)
-    
-    # If signature is b'ttcf', treat as a TrueType collection
-    if signature == b'ttcf':
-        ttc = TTCollection(font_path)  # remove fontNumber usage
-        font = ttc.fonts[font_index]   # pick the subfont from the collection
-    else:
-        font = TTFont(font_path)
-
-    # Attempt to read name table to get full name
-    name_table = font['name']
+    # Header-only read: works for TTC members and TTFs alike
+    with FontMeta(font_path, font_index) as font:
+        name_table = font['name']
     for record in name_table.names:
         if record.nameID == 4:  # Full font name
             if record.isUnicode():
@@ -30,7 +29,64 @@ def get_full_font_name(font_path, font_index=0):
                 return record.string.decode('utf-8', errors='ignore').strip()
     return "UnknownFontName"
 
-def make_mtz(ttf_path, preview_text_path="preview.txt", debug=False):
+def render_artifacts(tt, font_data, sample_text, font_name):
+    """Return {artifact name: bytes} for description.xml and the two preview images."""
+    missing = missing_characters(tt, sample_text)
+    if missing:
+        print(f"Warning: font has no glyph for {len(missing)} preview characters: {''.join(missing[:20])}")
+    # 预览图和 logo 共用一个只含所需字形的子集
+    render_data = subset_font_data(font_data, preview_text(sample_text, font_name, LOGO_SUFFIX))
+    preview = io.BytesIO()
+    render_preview(render_data, sample_text, font_name).save(preview, "JPEG", quality=RENDER_PARAMS['jpeg_quality'])
+    logo = io.BytesIO()
+    render_logo(font_name, render_data).save(logo, "PNG")
+    return {
+        "description.xml": build_description_xml(tt, font_name),
+        "preview_fonts_0.jpg": preview.getvalue(),
+        "preview_fonts_small_0.png": logo.getvalue(),
+    }
+
+def build_mtz(font_path, sample_text, output_dir=".", debug=False, mtz_name=None, use_cache=True):
+    """Build `<full name>.mtz` (or mtz_name) in output_dir from one font file; returns the package path.
+
+    The font is read once; description, logo and preview are produced in
+    memory and the font bytes go into the zip stored, not deflated.
+    Nothing touches the working directory, so this is safe to call from
+    several threads. Rendered artifacts are reused from mtz_cache unless
+    use_cache is False.
+    """
+    with open(font_path, 'rb') as f:
+        font_data = f.read()
+    tt = TTFont(io.BytesIO(font_data), fontNumber=0, lazy=True)
+    font_name = get_name_record(tt, 4) or "UnknownFontName"
+
+    artifacts = None
+    if use_cache:
+        key = mtz_cache.cache_key(font_data, sample_text, RENDER_PARAMS)
+        artifacts = mtz_cache.load(key)
+        if debug:
+            print(f"Cache {'hit' if artifacts else 'miss'}: {key[:16]}")
+    if artifacts is None:
+        artifacts = render_artifacts(tt, font_data, sample_text, font_name)
+        if use_cache:
+            mtz_cache.store(key, artifacts)
+
+    mtz_filename = os.path.join(output_dir, mtz_name or f"{font_name}.mtz")
+    entries = [
+        ("description.xml", artifacts["description.xml"], zipfile.ZIP_DEFLATED),
+        # TTF 几乎压缩不了，直接存储
+        ("fonts/Roboto-Regular.ttf", font_data, zipfile.ZIP_STORED),
+        ("preview/preview_fonts_0.jpg", artifacts["preview_fonts_0.jpg"], zipfile.ZIP_DEFLATED),
+        ("preview/preview_fonts_small_0.png", artifacts["preview_fonts_small_0.png"], zipfile.ZIP_DEFLATED),
+    ]
+    with zipfile.ZipFile(mtz_filename, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, data, compress_type in entries:
+            zf.writestr(name, data, compress_type=compress_type)
+            if debug:
+                print(f"  {name}: {len(data) / 1024:.1f} KB")
+    return mtz_filename
+
+def make_mtz(ttf_path, preview_text_path="preview.txt", debug=False, use_cache=True):
     # Convert to absolute paths
     ttf_path = os.path.abspath(ttf_path)
     preview_text_path = os.path.abspath(preview_text_path)
@@ -42,57 +98,126 @@ def make_mtz(ttf_path, preview_text_path="preview.txt", debug=False):
     if not os.path.exists(preview_text_path):
         print(f"Preview text file not found: {preview_text_path}")
         sys.exit(1)
-    
-    with tempfile.TemporaryDirectory() as temp_dir:
-        if debug:
-            print(f"Working in temporary directory: {temp_dir}")
-        
-        # Copy required files to temp dir
-        temp_font = os.path.join(temp_dir, "Roboto-Regular.ttf")
-        temp_preview_text = os.path.join(temp_dir, "preview.txt")
-        shutil.copy2(ttf_path, temp_font)
-        shutil.copy2(preview_text_path, temp_preview_text)
-        
-        # Generate files in temp directory
-        font_name = get_full_font_name(temp_font)
-        description_xml = os.path.join(temp_dir, "description.xml")
-        generate_description_xml(temp_font, description_xml)
-        
-        # Change to temp dir for preview generation
-        original_dir = os.getcwd()
-        os.chdir(temp_dir)
-        
-        # Create preview images
-        create_logo(font_name, temp_font)
-        create_preview(temp_font)
-        
-        # Create .mtz in original directory
-        mtz_filename = os.path.join(original_dir, f"{font_name}.mtz")
-        with zipfile.ZipFile(mtz_filename, 'w', zipfile.ZIP_DEFLATED) as zf:
-            zf.write("description.xml", "description.xml")
-            zf.write("Roboto-Regular.ttf", "fonts/Roboto-Regular.ttf")
-            if os.path.exists("preview_fonts_0.jpg"):
-                zf.write("preview_fonts_0.jpg", "preview/preview_fonts_0.jpg")
-            if os.path.exists("preview_fonts_small_0.png"):
-                zf.write("preview_fonts_small_0.png", "preview/preview_fonts_small_0.png")
-        
-        os.chdir(original_dir)
-        print(f"Created {mtz_filename}")
-        
-        if debug:
-            print("Debug mode: Temporary files preserved in:", temp_dir)
-            temp_dir = None
+
+    with open(preview_text_path, "r", encoding='utf-8') as f:
+        sample_text = f.read().strip()
+    mtz_filename = build_mtz(ttf_path, sample_text, os.getcwd(), debug, use_cache=use_cache)
+    print(f"Created {mtz_filename}")
+
+# 每个任务除字体本身外的大致内存占用（预览图、Pillow/FreeType 缓冲等）
+TASK_OVERHEAD = 96 * 1024 * 1024
+
+def pool_size(font_paths):
+    """Workers to use: bounded by cores, by the number of fonts and by available memory."""
+    workers = min(mp.cpu_count(), len(font_paths))
+    memory = available_memory()
+    if memory is not None:
+        # 字体在每个任务中大约同时存在三份（文件字节、fontTools、FreeType）
+        per_task = 3 * max(os.path.getsize(path) for path in font_paths) + TASK_OVERHEAD
+        workers = min(workers, memory // per_task)
+    return max(1, workers)
+
+def collect_fonts(pattern):
+    """Font files for a batch: every TTF/TTC in a directory, or the matches of a glob pattern."""
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, '*')
+    return sorted(path for path in glob.glob(pattern)
+                  if path.lower().endswith(('.ttf', '.ttc')) and os.path.isfile(path))
+
+def package_names(font_paths):
+    """Pick a distinct package name per font: `<full name>.mtz`, then `<full name> (2).mtz`..."""
+    names, taken = [], set()
+    for path in font_paths:
+        try:
+            with FontMeta(path) as font:
+                font_name = get_name_record(font, 4) or "UnknownFontName"
+        except Exception:
+            # 无法读取的字体交给任务本身报错
+            names.append(None)
+            continue
+        name, n = f"{font_name}.mtz", 1
+        while name in taken:
+            n += 1
+            name = f"{font_name} ({n}).mtz"
+        taken.add(name)
+        names.append(name)
+    return names
+
+def _build_task(task):
+    font_path, sample_text, output_dir, mtz_name, use_cache = task
+    start = time.time()
+    try:
+        mtz_filename = build_mtz(font_path, sample_text, output_dir, mtz_name=mtz_name, use_cache=use_cache)
+        return font_path, mtz_filename, os.path.getsize(mtz_filename), time.time() - start, None
+    except Exception as e:
+        return font_path, None, 0, time.time() - start, f"{type(e).__name__}: {e}"
+
+def make_mtz_batch(pattern, preview_text_path="preview.txt", output_dir=".", workers=None, use_cache=True):
+    """Build one .mtz per font matched by pattern (a directory or glob) in a worker pool.
+
+    A failing font is reported and skipped. Returns the list of
+    (font, mtz, size, seconds, error) results in input order.
+    """
+    font_paths = collect_fonts(pattern)
+    if not font_paths:
+        print(f"No TTF/TTC files found: {pattern}")
+        return []
+    with open(preview_text_path, "r", encoding='utf-8') as f:
+        sample_text = f.read().strip()
+    workers = workers or pool_size(font_paths)
+    print(f"Building {len(font_paths)} packages with {workers} workers")
+
+    start = time.time()
+    tasks = [(path, sample_text, output_dir, name, use_cache)
+             for path, name in zip(font_paths, package_names(font_paths))]
+    results = {}
+    if workers > 1:
+        with mp.Pool(workers) as pool:
+            for result in pool.imap_unordered(_build_task, tasks):
+                results[result[0]] = result
+                print(f"[{len(results)}/{len(tasks)}] {os.path.basename(result[0])}")
+    else:
+        for task in tasks:
+            result = _build_task(task)
+            results[result[0]] = result
+            print(f"[{len(results)}/{len(tasks)}] {os.path.basename(result[0])}")
+    results = [results[path] for path in font_paths]
+    print_summary(results, time.time() - start)
+    return results
+
+def print_summary(results, elapsed):
+    """Print a per-font table of time, package size and outcome."""
+    width = max(len(os.path.basename(font_path)) for font_path, *_ in results)
+    print(f"\n{'Font':<{width}}  {'Time':>7}  {'Size':>9}  Result")
+    for font_path, mtz_filename, size, seconds, error in results:
+        if error:
+            outcome, size_text = f"FAILED {error}", "-"
+        else:
+            outcome, size_text = os.path.basename(mtz_filename), f"{size / 1024 / 1024:.2f} MB"
+        print(f"{os.path.basename(font_path):<{width}}  {seconds:>6.2f}s  {size_text:>9}  {outcome}")
+    failed = sum(1 for result in results if result[4])
+    print(f"\n{len(results) - failed} built, {failed} failed, total {elapsed:.2f}s")
 
 if __name__ == "__main__":
-    if len(sys.argv) not in [2, 3, 4]:
-        print("Usage: python mtz_make.py <font.ttf> [preview.txt] [--debug]")
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    use_cache = "--no-cache" not in sys.argv
+    if "--batch" in sys.argv:
+        # 批量模式: python mtz_make.py --batch <目录或通配符> [preview.txt] [--jobs=N]
+        jobs = [int(arg.split('=', 1)[1]) for arg in sys.argv[1:] if arg.startswith('--jobs=')]
+        if not args:
+            print("Usage: python mtz_make.py --batch <directory or glob> [preview.txt] [--jobs=N] [--no-cache]")
+            sys.exit(1)
+        results = make_mtz_batch(args[0], args[1] if len(args) > 1 else "preview.txt",
+                                 workers=jobs[0] if jobs else None, use_cache=use_cache)
+        sys.exit(1 if not results or any(result[4] for result in results) else 0)
+
+    if len(args) not in [1, 2]:
+        print("Usage: python mtz_make.py <font.ttf> [preview.txt] [--debug] [--no-cache]")
+        print("       python mtz_make.py --batch <directory or glob> [preview.txt] [--jobs=N] [--no-cache]")
+        print("  --no-cache  ignore cached previews and descriptions (see mtz_cache.py)")
         sys.exit(1)
-    
+
     debug_mode = "--debug" in sys.argv
-    ttf_path = sys.argv[1]
-    preview_text_path = "preview.txt"
-    
-    if len(sys.argv) >= 3 and sys.argv[2] != "--debug":
-        preview_text_path = sys.argv[2]
-    
-    make_mtz(ttf_path, preview_text_path, debug_mode)
\ No newline at end of file
+    ttf_path = args[0]
+    preview_text_path = args[1] if len(args) > 1 else "preview.txt"
+    make_mtz(ttf_path, preview_text_path, debug_mode, use_cache)
\ No newline at end of file
@@ -1,86 +1,152 @@
+import io
 import os
 import sys
-import tempfile
-import atexit
+import time
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image, ImageDraw, ImageFont
-from fontTools.ttLib import TTFont, TTCollection
+from fontTools import subset
+from fontTools.ttLib import TTFont
+from cmap_index import cmap_index
+from font_meta import FontMeta
 
-# Cache already-extracted subfonts so we don't extract multiple times
-_extracted_paths = {}
+PREVIEW_SIZE = (1080, 2340)
+PREVIEW_SIZES = [18, 24, 36, 48, 60, 72]
+TITLE_SIZE = 60
+LABEL_SIZE = 32
+TEXT_X = 160
 
-def cleanup_temp_files():
-    """Delete all temporary extracted font files."""
-    for path in _extracted_paths.values():
-        try:
-            if os.path.exists(path):
-                os.unlink(path)
-        except Exception as e:
-            print(f"Warning: Failed to delete temp file {path}: {e}")
-    _extracted_paths.clear()
+def get_full_font_name(font_path, subfont_index=0):
+    full_name = os.path.basename(font_path)
+    with FontMeta(font_path, subfont_index) as tt:
+        if 'name' in tt:
+            for record in tt['name'].names:
+                if record.nameID == 4:
+                    try:
+                        return record.toUnicode()
+                    except:
+                        pass
+    return full_name
+
+def missing_characters(tt, text):
+    """Return the characters of text (whitespace aside) that the loaded font has no glyph for."""
+    chars = sorted(set(text) - set(" \t\r\n"))
+    mapped = cmap_index(tt).contains([ord(ch) for ch in chars])
+    return [ch for ch, found in zip(chars, mapped) if not found]
 
-# Register cleanup function to run on exit
-atexit.register(cleanup_temp_files)
+def preview_text(sample_text, title, extra=""):
+    """Every character the preview (and logo) will draw: sample text, title, size labels and extra.
 
-def _extract_subfont_if_ttc(font_path, subfont_index=0):
+    "A" is always included: Pillow sets the multiline line pitch from the
+    bbox of "A", so without it the pitch would come from .notdef.
     """
-    If font_path is a TTC, extract the subfont at subfont_index
-    to a temporary TTF file, returning its path. Otherwise return font_path.
+    labels = "".join(f"{size}pt" for size in PREVIEW_SIZES)
+    return sample_text + title + labels + extra + "A"
+
+def subset_font_data(font_data, text, font_index=0, timings=None):
+    """Return the bytes of a subset holding only the glyphs needed to draw text.
+
+    GSUB/GPOS features are kept for those glyphs so shaping is unchanged; a
+    TTC member is written out as a single font. Seconds are stored in
+    timings['subset'].
     """
-    # Check cache
-    cache_key = (font_path, subfont_index)
-    if cache_key in _extracted_paths:
-        return _extracted_paths[cache_key]
+    start = time.time()
+    font = TTFont(io.BytesIO(font_data), fontNumber=font_index, lazy=True)
+    options = subset.Options()
+    options.layout_features = ['*']
+    options.name_IDs = ['*']
+    options.name_languages = ['*']
+    options.notdef_outline = True
+    options.glyph_names = False
+    options.recalc_timestamp = False
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(text=text)
+    subsetter.subset(font)
+    buffer = io.BytesIO()
+    font.save(buffer)
+    if timings is not None:
+        timings['subset'] = time.time() - start
+    return buffer.getvalue()
 
-    with open(font_path, 'rb') as f:
-        signature = f.read(4)
-    if signature == b'ttcf':
-        ttc = TTCollection(font_path)
-        if subfont_index < 0 or subfont_index >= len(ttc.fonts):
-            raise ValueError(f"Subfont index {subfont_index} out of range.")
-        tf = tempfile.NamedTemporaryFile(suffix=".ttf", delete=False)
-        ttc.fonts[subfont_index].save(tf.name)
-        tf.close()
-        _extracted_paths[cache_key] = tf.name
-        return tf.name
-    # Not TTC, return original
-    return font_path
+class FontSizes:
+    """FreeType fonts for one face, created once per size from shared font bytes.
 
-def get_full_font_name(font_path, subfont_index=0):
-    extracted_path = _extract_subfont_if_ttc(font_path, subfont_index)
-    tt = TTFont(extracted_path)
-    full_name = os.path.basename(font_path)
-    if 'name' in tt:
-        for record in tt['name'].names:
-            if record.nameID == 4:
-                try:
-                    return record.toUnicode()
-                except:
-                    pass
-    return full_name
+    BytesIO over the original bytes object hands Pillow that same object,
+    so every size shares one copy of the font data. TTC members are
+    selected with `index`; nothing is extracted to disk.
+    """
 
-def create_preview(font_path, output_file="preview_fonts_0.jpg", subfont_index=0):
-    with open("preview.txt", "r", encoding='utf-8') as f:
-        sample_text = f.read().strip()
-    extracted_path = _extract_subfont_if_ttc(font_path, subfont_index)
-    img = Image.new('RGB', (1080, 2340), 'white')
+    def __init__(self, font_data, index=0):
+        self.font_data = font_data
+        self.index = index
+        self.fonts = {}
+
+    def __getitem__(self, size):
+        font = self.fonts.get(size)
+        if font is None:
+            font = self.fonts[size] = ImageFont.truetype(io.BytesIO(self.font_data), size, index=self.index)
+        return font
+
+def text_bbox(font, sample_text):
+    """Pillow's multiline bbox of the text drawn at (0, 0), measured without rasterizing.
+
+    Line pitch is bbox("A").bottom plus the default 4 px spacing, as in ImageDraw.text.
+    """
+    return ImageDraw.Draw(Image.new('L', (1, 1))).textbbox((0, 0), sample_text, font=font)
+
+def _render_row(font, sample_text):
+    start = time.time()
+    bbox = text_bbox(font, sample_text)
+    # 只渲染覆盖率蒙版，粘贴时与 draw.text 一样按蒙版混合，负的左右边距也不会被裁掉
+    mask = Image.new('L', (max(1, bbox[2] - bbox[0]), max(1, bbox[3] - bbox[1])), 0)
+    ImageDraw.Draw(mask).text((-bbox[0], -bbox[1]), sample_text, fill=255, font=font)
+    return mask, bbox, time.time() - start
+
+def render_preview(font_data, sample_text, title, font_index=0, threads=None, timings=None):
+    """Draw the preview image from font bytes; returns a PIL Image.
+
+    Each size row is measured and rasterized into its own mask, in parallel
+    threads when threads > 1, then composited from y=140 with the same
+    positions and spacing as drawing the rows one after another. Seconds
+    per row (keyed by size) are stored in `timings`.
+    """
+    if timings is None:
+        timings = {}
+    fonts = FontSizes(font_data, font_index)
+    img = Image.new('RGB', PREVIEW_SIZE, 'white')
     draw = ImageDraw.Draw(img)
-    title = get_full_font_name(font_path, subfont_index)
-    title_font = ImageFont.truetype(extracted_path, 60)
-    draw.text((40, 40), title, fill='black', font=title_font)
+    draw.text((40, 40), title, fill='black', font=fonts[TITLE_SIZE])
 
+    # 每行使用各自字号的字体对象，线程之间不共享 FreeType face
+    row_fonts = [fonts[size] for size in PREVIEW_SIZES]
+    threads = threads or min(len(PREVIEW_SIZES), os.cpu_count() or 1)
     y = 140
-    for size in [18, 24, 36, 48, 60, 72]:
-        try:
-            label_font = ImageFont.truetype(extracted_path, 32)
-            draw.text((40, y), f"{size}pt", fill='black', font=label_font)
-            body_font = ImageFont.truetype(extracted_path, size)
-            bbox = draw.textbbox((0, 0), sample_text, font=body_font)
-            text_height = bbox[3] - bbox[1]
-            draw.text((160, y), sample_text, fill='black', font=body_font)
-            y += max(text_height + 40, size + 40)
-        except Exception as e:
-            print(f"Error drawing size {size}pt: {e}")
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        futures = [executor.submit(_render_row, font, sample_text) for font in row_fonts]
+        for size, future in zip(PREVIEW_SIZES, futures):
+            try:
+                mask, bbox, elapsed = future.result()
+            except Exception as e:
+                print(f"Error drawing size {size}pt: {e}")
+                continue
+            draw.text((40, y), f"{size}pt", fill='black', font=fonts[LABEL_SIZE])
+            img.paste('black', (TEXT_X + bbox[0], y + bbox[1]), mask)
+            timings[size] = elapsed
+            y += max(bbox[3] - bbox[1] + 40, size + 40)
+    return img
 
+def create_preview(font_path, output_file="preview_fonts_0.jpg", subfont_index=0, timings=None):
+    with open("preview.txt", "r", encoding='utf-8') as f:
+        sample_text = f.read().strip()
+    with open(font_path, 'rb') as f:
+        font_data = f.read()
+    tt = TTFont(io.BytesIO(font_data), fontNumber=subfont_index, lazy=True)
+    missing = missing_characters(tt, sample_text)
+    if missing:
+        print(f"Warning: font has no glyph for {len(missing)} preview characters: {''.join(missing[:20])}")
+    title = get_full_font_name(font_path, subfont_index)
+    # 只保留预览用到的字形，FreeType 加载的字体从几十 MB 降到几十 KB
+    preview_data = subset_font_data(font_data, preview_text(sample_text, title), subfont_index, timings)
+    img = render_preview(preview_data, sample_text, title, timings=timings)
     img.save(output_file, quality=95)
     return output_file
 
@@ -92,5 +158,10 @@ if __name__ == "__main__":
     index = 0
     if len(sys.argv) > 2:
         index = int(sys.argv[2])
-    out = create_preview(font_file, subfont_index=index)
-    print(f"Generated preview: {out}")
\ No newline at end of file
+    start = time.time()
+    timings = {}
+    out = create_preview(font_file, subfont_index=index, timings=timings)
+    for key, elapsed in timings.items():
+        label = f"{key}pt" if isinstance(key, int) else key
+        print(f"  {label}: {elapsed * 1000:.1f} ms")
+    print(f"Generated preview: {out} ({time.time() - start:.2f}s)")
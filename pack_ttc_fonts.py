@@ -0,0 +1,47 @@
+import os
+import sys
+import mmap
+import time
+from contextlib import ExitStack
+from sfnt_io import read_ttc_offsets, read_sfnt_directory, write_ttc
+
+def pack_ttc(font_paths, output_path):
+    """Build a TTC from TTF (or TTC) files, storing tables with identical bytes once.
+
+    Inputs are memory-mapped and copied table by table without decompiling.
+    Every member of a TTC input becomes a member of the output. Returns
+    (member count, table bytes written, table bytes without sharing).
+    """
+    with ExitStack() as stack:
+        fonts = []
+        for path in font_paths:
+            f = stack.enter_context(open(path, 'rb'))
+            data = stack.enter_context(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+            view = memoryview(data)
+            stack.callback(view.release)
+            for offset in read_ttc_offsets(data):
+                sfnt_version, entries = read_sfnt_directory(data, offset)
+                # 保持每个字体原有的表物理顺序
+                tables = [(tag, view[start:start + length])
+                          for tag, start, length in sorted(entries, key=lambda e: e[1])]
+                stack.callback(lambda tables=tables: [table.release() for _, table in tables])
+                fonts.append((sfnt_version, tables))
+        written, unshared = write_ttc(output_path, fonts)
+    return len(fonts), written, unshared
+
+def main():
+    if len(sys.argv) < 4:
+        print("用法: python pack_ttc_fonts.py <输出TTC文件> <字体1.ttf> <字体2.ttf> [...]")
+        print("  相同字节的表（如 cmap、GSUB、post、name）只存储一份")
+        sys.exit(1)
+
+    output_path = sys.argv[1]
+    font_paths = sys.argv[2:]
+    start = time.time()
+    count, written, unshared = pack_ttc(font_paths, output_path)
+    saved = unshared - written
+    print(f"已生成: {output_path}（{count} 个字体，{os.path.getsize(output_path) / 1024 / 1024:.2f} MB）")
+    print(f"共享表节省: {saved / 1024:.1f} KB（{saved / max(unshared, 1):.1%}），耗时: {time.time() - start:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,24 @@
 import os
+import sys
 import time
-from fontTools.ttLib import TTFont
+import array
+import struct
+import numpy as np
+from fontTools.ttLib import TTFont, newTable
+from fontTools.ttLib.scaleUpem import ScalerVisitor
+from fontTools.ttLib.tables import TupleVariation as tv
+from fontTools.ttLib.tables.DefaultTable import DefaultTable
+from fontTools.ttLib.tables._g_l_y_f import (
+    Glyph, ARG_1_AND_2_ARE_WORDS, WE_HAVE_A_SCALE, WE_HAVE_AN_X_AND_Y_SCALE,
+    WE_HAVE_A_TWO_BY_TWO, MORE_COMPONENTS)
+from fontTools.ttLib.tables._g_v_a_r import table__g_v_a_r, decompileGlyph_
+from fontTools.misc.roundTools import otRound
 from fontTools.pens.ttGlyphPen import TTGlyphPen
 from fontTools.pens.transformPen import TransformPen
 from fontTools.misc.transform import Identity
 import multiprocessing as mp
-from multiprocessing.managers import SyncManager
-from functools import partial
+from multiprocessing import shared_memory
+from font_catalog import font_files
 
 def print_progress(current, total, width=50):
     progress = current / total
@@ -19,53 +31,555 @@ def print_progress(current, total, width=50):
 
 def list_ttf_files(directory):
     """Return TTF files sorted by modification time (newest first)"""
-    # Get files with timestamps
-    ttf_files = []
-    for f in os.listdir(directory):
-        if f.lower().endswith('.ttf'):
-            path = os.path.join(directory, f)
-            mtime = os.path.getmtime(path)
-            ttf_files.append((mtime, f))
-    
-    # Sort by timestamp descending
-    ttf_files.sort(reverse=True)
-    
-    # Return only filenames
-    return [f for _, f in ttf_files]
+    return font_files(directory)
 
-def fix_gvar_table(font):
-    if "gvar" not in font:
+def scale_glyph(glyph, scale, keep_hinting=False):
+    """Scale a decompiled glyph in place with one vectorized multiply-and-round.
+
+    Flags and endPtsOfContours are left untouched; composite glyphs get their
+    component offsets scaled instead. Instructions are dropped unless
+    keep_hinting is set (UPM conversion, where cvt is scaled too).
+    """
+    if glyph.isComposite():
+        for component in glyph.components:
+            # 按点对齐的组件没有 x/y 偏移
+            if hasattr(component, 'x'):
+                component.x = otRound(component.x * scale)
+                component.y = otRound(component.y * scale)
+        return glyph
+    if glyph.numberOfContours <= 0:
+        return glyph
+
+    # GlyphCoordinates 底层就是一段连续的 double 数组，直接原地缩放
+    coords = np.frombuffer(glyph.coordinates.array, dtype=np.float64)
+    np.multiply(coords, scale, out=coords)
+    # 与 otRound 一致：向上取整 .5
+    np.floor(coords + 0.5, out=coords)
+    # 原提示指令与缩放后的轮廓不再匹配（与 TTGlyphPen 路径一致）；
+    # 改 UPM 时 cvt 同步缩放，指令仍然有效，与 fontTools.ttLib.scaleUpem 一样保留
+    if not keep_hinting:
+        glyph.removeHinting()
+    return glyph
+
+def scale_glyph_batch(glyphs, scale):
+    """Scale many decompiled glyphs at once and set the bounds of the simple ones.
+
+    All simple-glyph points are concatenated into one array, scaled and
+    rounded in a single operation, then written back; bounds come from
+    per-glyph reductions over the same array. Composites only get their
+    component offsets scaled, their bounds depend on the scaled components.
+    """
+    simple = []
+    for glyph in glyphs:
+        if glyph.isComposite():
+            scale_glyph(glyph, scale)
+        elif glyph.numberOfContours > 0 and len(glyph.coordinates):
+            simple.append(glyph)
+    if not simple:
         return
+
+    views = [np.frombuffer(glyph.coordinates.array, dtype=np.float64) for glyph in simple]
+    lengths = np.array([len(view) for view in views], dtype=np.int64)
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    coords = np.concatenate(views)
+    np.multiply(coords, scale, out=coords)
+    np.floor(coords + 0.5, out=coords)
+    for view, start, length in zip(views, starts, lengths):
+        view[:] = coords[start:start + length]
+
+    xs, ys = coords[0::2], coords[1::2]
+    point_starts = starts // 2
+    bounds = np.stack([np.minimum.reduceat(xs, point_starts), np.minimum.reduceat(ys, point_starts),
+                       np.maximum.reduceat(xs, point_starts), np.maximum.reduceat(ys, point_starts)], axis=1)
+    for glyph, (x_min, y_min, x_max, y_max) in zip(simple, bounds.astype(int).tolist()):
+        glyph.xMin, glyph.yMin, glyph.xMax, glyph.yMax = x_min, y_min, x_max, y_max
+        glyph.removeHinting()
+
+# 子进程只需要原始 glyf/gvar 字节和偏移：fork 时写时复制继承这些全局变量，
+# 不支持 fork 的平台改用 shared_memory，不再把整个 glyf 表逐任务序列化
+_raw = {}
+_worker_glyf = None
+_shm = None
+
+# gvar 表头: version, reserved, axisCount, sharedTupleCount, offsetToSharedTuples,
+# glyphCount, flags, offsetToGlyphVariationData
+GVAR_HEADER = struct.Struct(">HHHHIHHI")
+
+def load_raw_glyf(font):
+    """Return the compiled glyf bytes and loca offsets straight from the font file."""
+    glyf_data = font.reader['glyf']
+    if font['head'].indexToLocFormat:
+        offsets = np.frombuffer(font.reader['loca'], dtype='>u4').astype(np.int64)
+    else:
+        offsets = np.frombuffer(font.reader['loca'], dtype='>u2').astype(np.int64) * 2
+    return glyf_data, offsets
+
+def raw_glyph_bounds(font):
+    """Read every glyph's bbox from its compiled header without decoding outlines.
+
+    Returns an (n, 4) int64 array of (xMin, yMin, xMax, yMax), a mask of
+    glyphs with outlines and a mask of composite glyphs.
+    """
+    glyf_data, offsets = load_raw_glyf(font)
+    starts = offsets[:-1]
+    has_outline = offsets[1:] - starts >= 10
+    buffer = np.frombuffer(glyf_data, dtype=np.uint8)
+    # 字形头: numberOfContours, xMin, yMin, xMax, yMax，均为 int16
+    headers = buffer[starts[has_outline, None] + np.arange(10)].copy().view('>i2')
+    bounds = np.zeros((len(starts), 4), dtype=np.int64)
+    bounds[has_outline] = headers[:, 1:]
+    is_composite = np.zeros(len(starts), dtype=bool)
+    is_composite[has_outline] = headers[:, 0] < 0
+    return bounds, has_outline, is_composite
+
+def parse_gvar_header(data):
+    """Return (axisCount, sharedTupleCount, shared tuple bytes, absolute per-glyph offsets)."""
+    (_, _, axis_count, shared_count, shared_offset,
+     glyph_count, flags, data_offset) = GVAR_HEADER.unpack_from(data)
+    if flags & 1:
+        offsets = np.frombuffer(data, dtype='>u4', count=glyph_count + 1, offset=GVAR_HEADER.size)
+        offsets = offsets.astype(np.int64)
+    else:
+        offsets = np.frombuffer(data, dtype='>u2', count=glyph_count + 1, offset=GVAR_HEADER.size)
+        offsets = offsets.astype(np.int64) * 2
+    shared = data[shared_offset:shared_offset + shared_count * axis_count * 2]
+    return axis_count, shared_count, shared, offsets + data_offset
+
+def build_gvar(axis_count, shared_count, shared, pieces):
+    """Assemble a gvar table from per-glyph GlyphVariationData blobs (each even-length)."""
+    offsets = np.zeros(len(pieces) + 1, dtype=np.int64)
+    np.cumsum([len(piece) for piece in pieces], out=offsets[1:])
+    if offsets[-1] <= 0xFFFF * 2:
+        packed, flags = (offsets // 2).astype('>u2').tobytes(), 0
+    else:
+        packed, flags = offsets.astype('>u4').tobytes(), 1
+    shared_offset = GVAR_HEADER.size + len(packed)
+    header = GVAR_HEADER.pack(1, 0, axis_count, shared_count, shared_offset,
+                              len(pieces), flags, shared_offset + len(shared))
+    return b"".join([header, packed, shared] + pieces)
+
+def raw_table(tag, data):
+    """Wrap already-compiled bytes so TTFont.save writes them through unchanged."""
+    table = DefaultTable(tag)
+    table.data = data
+    return table
+
+def table_data(font, tag):
+    """Return a table's compiled bytes: a raw_table() replacement if set, else the file's copy."""
+    table = font.tables.get(tag)
+    if type(table) is DefaultTable:
+        return table.data
+    return font.reader[tag]
+
+def raw_point_count(data):
+    """Return the gvar point count (outline points or components + 4 phantoms) of a compiled glyph."""
+    if len(data) < 10:
+        return 4
+    num_contours = struct.unpack_from(">h", data)[0]
+    if num_contours == 0:
+        return 4
+    if num_contours > 0:
+        return struct.unpack_from(">H", data, 10 + 2 * (num_contours - 1))[0] + 1 + 4
+    if num_contours != -1:
+        glyph = Glyph(bytes(data))
+        glyph.expand(_worker_glyf)
+        return table__g_v_a_r.getNumPoints_(glyph)
+    # 组合字形：逐个跳过组件记录，只数个数
+    pos, count = 10, 0
+    while True:
+        flags = struct.unpack_from(">H", data, pos)[0]
+        pos += 4 + (4 if flags & ARG_1_AND_2_ARE_WORDS else 2)
+        if flags & WE_HAVE_A_SCALE:
+            pos += 2
+        elif flags & WE_HAVE_AN_X_AND_Y_SCALE:
+            pos += 4
+        elif flags & WE_HAVE_A_TWO_BY_TWO:
+            pos += 8
+        count += 1
+        if not flags & MORE_COMPONENTS:
+            return count + 4
+
+def scale_glyph_variations(data, point_count, axis_count, scale, phantom_scale):
+    """Scale the packed deltas of one GlyphVariationData blob.
+
+    point_count includes the four phantom points. Tuple headers, shared
+    tuples and point numbers are copied verbatim; each tuple's x and y
+    deltas are decoded into one array, scaled and re-packed.
+    """
+    if len(data) < 4:
+        return b""
+    tuple_count, data_offset = struct.unpack_from(">HH", data)
+    pos = 4
+    headers = []
+    for _ in range(tuple_count & tv.TUPLE_COUNT_MASK):
+        size, flags = struct.unpack_from(">HH", data, pos)
+        header_size = tv.TupleVariation.getTupleSize_(flags, axis_count)
+        headers.append((data[pos + 2:pos + header_size], size, flags))
+        pos += header_size
+
+    pos = data_offset
+    shared_points = None
+    if tuple_count & tv.TUPLES_SHARE_POINT_NUMBERS:
+        shared_points, pos = tv.TupleVariation.decompilePoints_(point_count, data, pos, 'gvar')
+    body = [data[data_offset:pos]]
+    new_headers = []
+    for header_rest, size, flags in headers:
+        end = pos + size
+        points = shared_points
+        if flags & tv.PRIVATE_POINT_NUMBERS:
+            points, pos_deltas = tv.TupleVariation.decompilePoints_(point_count, data, pos, 'gvar')
+        else:
+            pos_deltas = pos
+        points = np.asarray(points, dtype=np.int64)
+        deltas, _ = tv.TupleVariation.decompileDeltas_(2 * len(points), data, pos_deltas)
+        factors = np.where(points < point_count - 4, scale, phantom_scale)
+        deltas = np.asarray(deltas, dtype=np.float64).reshape(2, -1) * factors
+        deltas = np.floor(deltas + 0.5).astype(np.int64)
+        packed = (data[pos:pos_deltas]
+                  + tv.TupleVariation.compileDeltaValues_(deltas[0].tolist())
+                  + tv.TupleVariation.compileDeltaValues_(deltas[1].tolist()))
+        new_headers.append(struct.pack(">H", len(packed)) + header_rest)
+        body.append(packed)
+        pos = end
+
+    headers_blob = b"".join(new_headers)
+    result = struct.pack(">HH", tuple_count, 4 + len(headers_blob)) + headers_blob + b"".join(body)
+    if len(result) % 2:
+        result += b"\0"
+    return result
+
+def _set_worker_state(raw, glyph_order):
+    global _raw, _worker_glyf
+    _raw = raw
+    # 组合字形编解码时只用到 glyphOrder 做 ID <-> 名称映射
+    _worker_glyf = newTable('glyf')
+    _worker_glyf.glyphOrder = glyph_order
+    _worker_glyf.glyphs = {}
+
+def _attach_shared_memory(shm_name, raw, glyph_order):
+    """Pool initializer for platforms without fork: glyf and gvar live in one shared block."""
+    global _shm
+    _shm = shared_memory.SharedMemory(name=shm_name)
+    glyf_size = raw.pop('glyf_size')
+    raw['glyf'] = _shm.buf[:glyf_size]
+    if 'gvar' in raw:
+        raw['gvar'] = _shm.buf[glyf_size:glyf_size + raw.pop('gvar_size')]
+    _set_worker_state(raw, glyph_order)
+
+def _redraw_glyph(glyph, scale):
+    """Legacy path: redraw a simple glyph through TransformPen -> TTGlyphPen."""
+    pen = TTGlyphPen(None)
+    transform_pen = TransformPen(pen, Identity.scale(scale))
+    glyph.draw(transform_pen, _worker_glyf)
+    return pen.glyph()
+
+def process_glyph_range(task):
+    """Decode, scale and re-encode glyphs [start, end) from the raw glyf/gvar bytes.
+
+    Returns the compiled glyphs and gvar blobs joined into buffers plus
+    per-glyph lengths and int16 bounds, so only compact arrays travel back
+    to the parent.
+    """
+    start, end, scale, engine, phantom_scale, keep_hinting = task
+    glyf_data, offsets = _raw['glyf'], _raw['loca']
+    gvar_data = _raw.get('gvar')
+    pieces, var_pieces = [], []
+    lengths = np.zeros(end - start, dtype=np.int64)
+    var_lengths = np.zeros(end - start, dtype=np.int64)
+    bounds = np.zeros((end - start, 4), dtype=np.int64)
+    dropped = 0
+    for i, gid in enumerate(range(start, end)):
+        data = bytes(glyf_data[offsets[gid]:offsets[gid + 1]])
+        glyph = Glyph(data)
+        glyph.expand(_worker_glyf)
+        if glyph.numberOfContours != 0:
+            if glyph.isComposite():
+                if engine == "numpy":
+                    scale_glyph(glyph, scale, keep_hinting)
+                # 组件的新边界要等所有字形缩放完后由主进程计算
+            else:
+                if engine == "numpy":
+                    scale_glyph(glyph, scale, keep_hinting)
+                elif engine == "pen":
+                    glyph = _redraw_glyph(glyph, scale)
+                else:
+                    # 其他轮廓变换（如 weight_font 的描边加粗）以函数形式传入
+                    glyph = engine(glyph, scale)
+                glyph.recalcBounds(_worker_glyf)
+                bounds[i] = (glyph.xMin, glyph.yMin, glyph.xMax, glyph.yMax)
+            data = glyph.compile(_worker_glyf, recalcBBoxes=False)
+            pieces.append(data)
+            lengths[i] = len(data)
+
+        if gvar_data is not None and gid + 1 < len(_raw['gvar_offsets']):
+            var_offsets = _raw['gvar_offsets']
+            var_data = bytes(gvar_data[var_offsets[gid]:var_offsets[gid + 1]])
+            if var_data:
+                point_count = table__g_v_a_r.getNumPoints_(glyph)
+                try:
+                    var_data = scale_glyph_variations(var_data, point_count, _raw['axis_count'],
+                                                      scale, phantom_scale)
+                except (AssertionError, IndexError, struct.error):
+                    # 与 fix_gvar_table 一致：无法解码的变体数据直接丢弃
+                    var_data = b""
+                    dropped += 1
+                var_pieces.append(var_data)
+                var_lengths[i] = len(var_data)
+    return (start, b"".join(pieces), lengths, bounds,
+            b"".join(var_pieces), var_lengths, dropped)
+
+def _worker_pool(font, raw, processes):
+    """Create a pool whose workers see the raw glyf/gvar data without copying it per task."""
+    glyph_order = font.getGlyphOrder()
+    if "fork" in mp.get_all_start_methods():
+        _set_worker_state(raw, glyph_order)
+        return mp.get_context("fork").Pool(processes), None
+    glyf_size = len(raw['glyf'])
+    gvar_size = len(raw['gvar']) if 'gvar' in raw else 0
+    shm = shared_memory.SharedMemory(create=True, size=max(1, glyf_size + gvar_size))
+    shm.buf[:glyf_size] = raw['glyf']
+    shared = {key: value for key, value in raw.items() if key not in ('glyf', 'gvar')}
+    shared['glyf_size'] = glyf_size
+    if 'gvar' in raw:
+        shm.buf[glyf_size:glyf_size + gvar_size] = raw['gvar']
+        shared['gvar_size'] = gvar_size
+    pool = mp.Pool(processes, initializer=_attach_shared_memory,
+                   initargs=(shm.name, shared, glyph_order))
+    return pool, shm
+
+def check_glyph_range(task):
+    """Decode the gvar data of glyphs [start, end) one at a time; return the IDs that fail."""
+    start, end = task
+    glyf_data, offsets = _raw['glyf'], _raw['loca']
+    gvar_data, var_offsets = _raw['gvar'], _raw['gvar_offsets']
     broken = []
-    for glyph_name in list(font["gvar"].variations.keys()):
+    for gid in range(start, min(end, len(var_offsets) - 1)):
+        var_data = bytes(gvar_data[var_offsets[gid]:var_offsets[gid + 1]])
+        if not var_data:
+            continue
         try:
-            _ = font["gvar"].variations[glyph_name]
-        except AssertionError:
-            broken.append(glyph_name)
-    for glyph_name in broken:
-        del font["gvar"].variations[glyph_name]
+            point_count = raw_point_count(glyf_data[offsets[gid]:offsets[gid + 1]])
+            decompileGlyph_(point_count, _raw['shared_tuples'], _raw['axis_tags'], var_data)
+        except (AssertionError, IndexError, struct.error):
+            broken.append(gid)
+    return broken
 
-def process_glyph_chunk(chunk_data):
-    chunk, scale, glyf_table = chunk_data
-    results = {}
+def fix_gvar_table(font):
+    """Find glyphs whose gvar data cannot be decoded and drop their variations.
 
-    # show start of chunk work with thread id
-    print(f"开始处理字形块, {len(chunk)}个字形，线程ID: {mp.current_process().name}")
+    Works on the raw gvar bytes in parallel chunks instead of decompiling the
+    whole table; when nothing is broken gvar is left untouched and is copied
+    through as raw bytes on save.
+    """
+    if "gvar" not in font:
+        return []
+    gvar_data = table_data(font, 'gvar')
+    glyf_data, offsets = load_raw_glyf(font)
+    axis_count, shared_count, shared, var_offsets = parse_gvar_header(gvar_data)
+    axis_tags = [axis.axisTag for axis in font['fvar'].axes]
+    raw = {
+        'glyf': glyf_data, 'loca': offsets,
+        'gvar': gvar_data, 'gvar_offsets': var_offsets,
+        'axis_tags': axis_tags,
+        'shared_tuples': tv.decompileSharedTuples(axis_tags, shared_count, shared, 0),
+    }
+    glyph_order = font.getGlyphOrder()
+    total = len(var_offsets) - 1
+    cpu_count = mp.cpu_count()
+    chunk_size = max(1, min(2000, total // cpu_count))
+    tasks = [(i, i + chunk_size) for i in range(0, total, chunk_size)]
 
-    for glyph_name, glyph in chunk:
-        if glyph.isComposite():
+    broken = []
+    if cpu_count > 1:
+        pool, shm = _worker_pool(font, raw, cpu_count)
+        try:
+            for chunk_broken in pool.imap_unordered(check_glyph_range, tasks):
+                broken.extend(chunk_broken)
+        finally:
+            pool.close()
+            pool.join()
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+    else:
+        _set_worker_state(raw, glyph_order)
+        for task in tasks:
+            broken.extend(check_glyph_range(task))
+
+    if broken:
+        pieces = [bytes(gvar_data[var_offsets[gid]:var_offsets[gid + 1]]) for gid in range(total)]
+        for gid in broken:
+            pieces[gid] = b""
+        font['gvar'] = raw_table('gvar', build_gvar(axis_count, shared_count, shared, pieces))
+        print(f"已移除 {len(broken)} 个损坏的 gvar 字形变体")
+    return [glyph_order[gid] for gid in sorted(broken)]
+
+def _scale_var_store(var_store, scale):
+    """Scale every delta of an ItemVariationStore as one array per VarData."""
+    for var_data in var_store.VarData:
+        if not var_data.Item:
             continue
-            
-        pen = TTGlyphPen(None)
-        transform = Identity.scale(scale)
-        transform_pen = TransformPen(pen, transform)
-        # Pass glyf_table to draw()
-        glyph.draw(transform_pen, glyf_table)
-        results[glyph_name] = pen.glyph()
-            
-    return results
-
-def adjust_weight(font, scale):
+        items = np.floor(np.asarray(var_data.Item, dtype=np.float64) * scale + 0.5)
+        var_data.Item = items.astype(np.int64).tolist()
+        var_data.calculateNumShorts()
+
+# 以字体单位存储数值、交给 ScalerVisitor 逐字段缩放的小表
+VISITOR_TABLES = ('OS/2', 'hhea', 'vhea', 'post', 'VORG', 'kern', 'GPOS', 'GDEF', 'BASE', 'MATH', 'COLR')
+
+def scale_metrics(font, scale, timings=None):
+    """Scale everything outside glyf/gvar that is stored in font units.
+
+    hmtx/vmtx, cvt and the HVAR/VVAR/MVAR deltas are scaled as arrays; the
+    header fields of OS/2, hhea, vhea, post and the kern/GPOS/GDEF/BASE/MATH/
+    COLR values go through fontTools' ScalerVisitor. head bounds are
+    refreshed by update_font_bounds. Per-table seconds are added to `timings`.
+    """
+    if timings is None:
+        timings = {}
+    visitor = ScalerVisitor(scale)
+    for tag in VISITOR_TABLES:
+        if tag in font:
+            start = time.time()
+            visitor.visit(font[tag])
+            timings[tag] = time.time() - start
+    for tag in ('hmtx', 'vmtx'):
+        if tag in font:
+            start = time.time()
+            metrics = font[tag].metrics
+            names = list(metrics.keys())
+            values = np.asarray(list(metrics.values()), dtype=np.float64)
+            values = np.floor(values * scale + 0.5).astype(np.int64).tolist()
+            metrics.update(zip(names, map(tuple, values)))
+            timings[tag] = time.time() - start
+    for tag in ('HVAR', 'VVAR', 'MVAR'):
+        if tag in font:
+            start = time.time()
+            _scale_var_store(font[tag].table.VarStore, scale)
+            timings[tag] = time.time() - start
+    if 'cvt ' in font:
+        start = time.time()
+        cvt = np.floor(np.asarray(font['cvt '].values, dtype=np.float64) * scale + 0.5)
+        font['cvt '].values = array.array('h', np.clip(cvt, -32768, 32767).astype(np.int16))
+        timings['cvt '] = time.time() - start
+    return timings
+
+def update_font_bounds(font, bounds, has_outline, lsb_glyphs=None):
+    """Refresh head bbox, hmtx lsb and hhea extents from per-glyph bounds arrays.
+
+    lsb is reset to xMin for every glyph with an outline, or only for the
+    glyph IDs in lsb_glyphs when given (edits that moved a few glyphs).
+    """
+    glyph_order = font.getGlyphOrder()
+    hmtx = font['hmtx'].metrics
+    if has_outline.any():
+        drawn = bounds[has_outline]
+        head = font['head']
+        head.xMin, head.yMin = (int(v) for v in drawn[:, :2].min(axis=0))
+        head.xMax, head.yMax = (int(v) for v in drawn[:, 2:].max(axis=0))
+
+    advances = np.array([hmtx[name][0] for name in glyph_order], dtype=np.int64)
+    # TrueType 要求 lsb == xMin
+    changed = np.flatnonzero(has_outline)
+    if lsb_glyphs is not None:
+        changed = np.intersect1d(changed, lsb_glyphs)
+    for gid in changed:
+        name = glyph_order[gid]
+        hmtx[name] = (hmtx[name][0], int(bounds[gid, 0]))
+
+    hhea = font['hhea']
+    hhea.advanceWidthMax = int(advances.max())
+    if has_outline.any():
+        lsb = bounds[has_outline, 0]
+        width = bounds[has_outline, 2] - lsb
+        hhea.minLeftSideBearing = int(lsb.min())
+        hhea.minRightSideBearing = int((advances[has_outline] - lsb - width).min())
+        hhea.xMaxExtent = int((lsb + width).max())
+
+def scale_outlines(font, scale, engine="numpy", phantom_scale=1.0, keep_hinting=False):
+    """Scale every glyph and its gvar deltas in one pass over glyph IDs.
+
+    engine is "numpy", "pen", or a module-level function(glyph, amount) that
+    transforms each simple glyph in place without changing its point
+    structure; gvar is only rescaled by the numpy engine. keep_hinting keeps
+    glyph instructions with the numpy engine. Returns the
+    per-glyph bounds array and a mask of glyphs with outlines, ready for
+    update_font_bounds().
+    """
+    glyf_data, offsets = load_raw_glyf(font)
+    raw = {'glyf': glyf_data, 'loca': offsets}
+    # 旧的逐点重绘会改变点数，无法与 gvar 对应，只在向量化引擎下缩放 gvar
+    if 'gvar' in font and engine == "numpy":
+        gvar_data = table_data(font, 'gvar')
+        axis_count, shared_count, shared, var_offsets = parse_gvar_header(gvar_data)
+        raw.update(gvar=gvar_data, gvar_offsets=var_offsets, axis_count=axis_count)
+    glyph_order = font.getGlyphOrder()
+    total_glyphs = len(glyph_order)
+
+    # 按小块分发任务：结果边到边拼回，峰值内存不随核数增长
+    cpu_count = mp.cpu_count()
+    chunk_size = max(1, min(2000, total_glyphs // cpu_count))
+    tasks = [(i, min(i + chunk_size, total_glyphs), scale, engine, phantom_scale, keep_hinting)
+             for i in range(0, total_glyphs, chunk_size)]
+
+    if cpu_count > 1:
+        pool, shm = _worker_pool(font, raw, cpu_count)
+        results = pool.imap_unordered(process_glyph_range, tasks)
+    else:
+        pool, shm = None, None
+        _set_worker_state(raw, glyph_order)
+        results = map(process_glyph_range, tasks)
+
+    glyf_table = font['glyf']
+    bounds = np.zeros((total_glyphs, 4), dtype=np.int64)
+    lengths = np.zeros(total_glyphs, dtype=np.int64)
+    var_pieces = [b""] * total_glyphs
+    composites = []
+    processed = 0
+    dropped = 0
+    try:
+        for (start, buffer, chunk_lengths, chunk_bounds,
+             var_buffer, chunk_var_lengths, chunk_dropped) in results:
+            bounds[start:start + len(chunk_lengths)] = chunk_bounds
+            lengths[start:start + len(chunk_lengths)] = chunk_lengths
+            pos = var_pos = 0
+            for gid, (length, var_length) in enumerate(zip(chunk_lengths, chunk_var_lengths), start=start):
+                data = buffer[pos:pos + length]
+                pos += length
+                glyf_table.glyphs[glyph_order[gid]] = Glyph(data)
+                if data[:2] == b"\xff\xff":
+                    composites.append(gid)
+                var_pieces[gid] = var_buffer[var_pos:var_pos + var_length]
+                var_pos += var_length
+            dropped += chunk_dropped
+            processed += len(chunk_lengths)
+            print_progress(processed, total_glyphs)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+
+    # 组合字形的边界依赖已缩放的组件
+    for gid in composites:
+        glyph = glyf_table[glyph_order[gid]]
+        glyph.recalcBounds(glyf_table)
+        bounds[gid] = (glyph.xMin, glyph.yMin, glyph.xMax, glyph.yMax)
+    if 'gvar' in raw:
+        font['gvar'] = raw_table('gvar', build_gvar(axis_count, shared_count, shared, var_pieces))
+        if dropped:
+            print(f"\n已丢弃 {dropped} 个无法解码的 gvar 字形变体")
+    # 边界由调用方通过 update_font_bounds 写回，保存时无需再展开全部字形
+    font.recalcBBoxes = False
+    return bounds, lengths > 0
+
+def adjust_weight(font, scale, engine="numpy", scale_font_metrics=False):
+    """Scale every glyph (and its gvar deltas) by `scale`.
+
+    With scale_font_metrics the advances, vertical metrics and metric
+    variation deltas are scaled as well, i.e. the whole font is transformed.
+    """
     # Start timing for gvar fix
     fix_start = time.time()
     print("开始修复 gvar...")
@@ -76,33 +590,19 @@ def adjust_weight(font, scale):
     # Start timing for scaling
     scale_start = time.time()
     print("\n开始缩放处理...")
-    
-    glyf_table = font['glyf']
-    glyphs = [(name, glyf_table[name]) for name in font.getGlyphOrder()]
-    total_glyphs = len(glyphs)
-    
-    # Split work into chunks
-    cpu_count = mp.cpu_count()
-    chunk_size = max(1, total_glyphs // cpu_count)
-    chunks = [glyphs[i:i + chunk_size] for i in range(0, len(glyphs), chunk_size)]
-    chunks_with_data = [(chunk, scale, glyf_table) for chunk in chunks]
-    
-    # Process in parallel
-    with mp.Pool(cpu_count) as pool:
-        results = pool.map(process_glyph_chunk, chunks_with_data)
-    
-    # Merge results
-    processed = 0
-    for chunk_result in results:
-        for glyph_name, new_glyph in chunk_result.items():
-            glyf_table[glyph_name] = new_glyph
-            processed += 1
-            # Show progress every 10 glyphs
-            if processed % 1000 == 0 or processed == total_glyphs:
-                print_progress(processed, total_glyphs)
-            
+
+    # 幻影点决定步进宽度的变化，只有整体缩放度量时才一起缩放
+    phantom_scale = scale if scale_font_metrics else 1.0
+    bounds, has_outline = scale_outlines(font, scale, engine, phantom_scale)
+    if scale_font_metrics:
+        scale_metrics(font, scale)
+    update_font_bounds(font, bounds, has_outline)
+
+    total_glyphs = len(has_outline)
     scale_time = time.time() - scale_start
     print(f"\n缩放完成，耗时: {scale_time:.2f}s")
+    if scale_time > 0:
+        print(f"缩放速度: {total_glyphs / scale_time:.0f} 字形/秒 ({engine})")
     
     return fix_time, scale_time
 
@@ -146,6 +646,8 @@ def main():
     except ValueError:
         print("输入无效。")
         return
+    # 整体缩放：步进宽度、行高等度量及其变体数据一起缩放
+    scale_font_metrics = input("是否同时缩放步进宽度和行高等度量？(y/N)：").strip().lower() == 'y'
     input_time = time.time() - step_start
     print(f"输入处理耗时: {input_time:.2f}s\n")
 
@@ -156,7 +658,9 @@ def main():
     load_time = time.time() - step_start
     print(f"字体加载耗时: {load_time:.2f}s\n")
 
-    fix_time, scale_time = adjust_weight(font, scale)
+    # --pen 使用旧的逐点重绘路径（用于对比）
+    engine = "pen" if "--pen" in sys.argv[1:] else "numpy"
+    fix_time, scale_time = adjust_weight(font, scale, engine, scale_font_metrics)
 
     print("保存字体中...")
     step_start = time.time()
@@ -0,0 +1,183 @@
+import os
+import struct
+import hashlib
+import numpy as np
+from fontTools.misc.textTools import Tag, tobytes
+from fontTools.ttLib import getTableClass
+from fontTools.ttLib.ttFont import getSearchRange
+
+# 整个文件的校验和加上 checkSumAdjustment 必须等于这个常数
+CHECKSUM_MAGIC = 0xB1B0AFBA
+SFNT_HEADER = struct.Struct(">4sHHHH")
+DIRECTORY_ENTRY = struct.Struct(">4sLLL")
+TTC_HEADER = struct.Struct(">4sLL")
+
+def table_checksum(data):
+    """Sum of big-endian uint32 words of data, zero padded to 4 bytes, modulo 2**32."""
+    full = len(data) // 4
+    total = int(np.frombuffer(data, dtype='>u4', count=full).sum(dtype=np.uint64)) if full else 0
+    tail = bytes(data[full * 4:])
+    if tail:
+        total += int.from_bytes(tail.ljust(4, b"\0"), 'big')
+    return total & 0xFFFFFFFF
+
+def read_ttc_offsets(data):
+    """Return the sfnt header offsets of every member of a TTC, or [0] for a plain SFNT file."""
+    tag, _, num_fonts = TTC_HEADER.unpack_from(data)
+    if tag != b"ttcf":
+        return [0]
+    return list(struct.unpack_from(f">{num_fonts}L", data, TTC_HEADER.size))
+
+def read_sfnt_directory(data, offset=0):
+    """Parse the table directory at offset; returns (sfntVersion, [(tag, offset, length), ...]).
+
+    Table offsets are absolute in the file, as in both TTF and TTC files.
+    """
+    sfnt_version, num_tables = SFNT_HEADER.unpack_from(data, offset)[:2]
+    entries = []
+    for i in range(num_tables):
+        tag, _, table_offset, length = DIRECTORY_ENTRY.unpack_from(
+            data, offset + SFNT_HEADER.size + i * DIRECTORY_ENTRY.size)
+        entries.append((Tag(tag), table_offset, length))
+    return sfnt_version, entries
+
+def sfnt_directory(sfnt_version, entries):
+    """Pack an sfnt header and table directory from (tag, checksum, offset, length) entries."""
+    search_range, entry_selector, range_shift = getSearchRange(len(entries), 16)
+    directory = SFNT_HEADER.pack(tobytes(sfnt_version, encoding='latin-1'), len(entries),
+                                 search_range, entry_selector, range_shift)
+    return directory + b"".join(DIRECTORY_ENTRY.pack(tobytes(tag), checksum, table_offset, length)
+                                for tag, checksum, table_offset, length in sorted(entries))
+
+def write_sfnt(output_path, sfnt_version, tables):
+    """Write an SFNT font from (tag, data) pairs, laid out in the given physical order.
+
+    Offsets are 4-byte aligned with zero padding, the directory is sorted by
+    tag, every table checksum is recomputed and head.checkSumAdjustment is
+    set. data may be bytes, bytearray or memoryview; it is written as is.
+    """
+    tables = list(tables)
+    entries = []
+    offset = SFNT_HEADER.size + DIRECTORY_ENTRY.size * len(tables)
+    head_index = None
+    for index, (tag, data) in enumerate(tables):
+        if tag == 'head':
+            # head 的校验和按 checkSumAdjustment 为 0 计算
+            data = bytearray(data)
+            data[8:12] = b"\0\0\0\0"
+            tables[index] = (tag, data)
+            head_index = index
+        entries.append((Tag(tag), table_checksum(data), offset, len(data)))
+        offset += (len(data) + 3) & ~3
+
+    directory = sfnt_directory(sfnt_version, entries)
+    if head_index is not None:
+        total = table_checksum(directory) + sum(checksum for _, checksum, _, _ in entries)
+        tables[head_index][1][8:12] = struct.pack(">L", (CHECKSUM_MAGIC - total) & 0xFFFFFFFF)
+
+    # 先写临时文件再替换，输出路径与输入相同时也不会边读边写
+    temp_path = output_path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(directory)
+        for _, data in tables:
+            f.write(data)
+            f.write(b"\0" * (-len(data) % 4))
+    os.replace(temp_path, output_path)
+
+def write_ttc(output_path, fonts):
+    """Write a TrueType collection from [(sfntVersion, [(tag, data), ...]), ...].
+
+    Tables with identical bytes are stored once and shared between members'
+    directories; head is always per member, since its checkSumAdjustment is
+    computed for each member. Returns (bytes of table data written, bytes
+    the same tables would take unshared).
+    """
+    header_size = TTC_HEADER.size + 4 * len(fonts)
+    offset = header_size + sum(SFNT_HEADER.size + DIRECTORY_ENTRY.size * len(tables) for _, tables in fonts)
+    stored = {}
+    blobs = []
+    members = []
+    unshared = 0
+    for sfnt_version, tables in fonts:
+        entries, head = [], None
+        for tag, data in tables:
+            unshared += (len(data) + 3) & ~3
+            if tag == 'head':
+                head = bytearray(data)
+                head[8:12] = b"\0\0\0\0"
+                key, data = None, head
+            else:
+                key = (len(data), hashlib.sha256(data).digest())
+            if key is None or key not in stored:
+                location = (offset, table_checksum(data))
+                if key is not None:
+                    stored[key] = location
+                blobs.append(data)
+                offset += (len(data) + 3) & ~3
+            else:
+                location = stored[key]
+            entries.append((Tag(tag), location[1], location[0], len(data)))
+        members.append((sfnt_version, entries, head))
+
+    offsets, directories = [], []
+    position = header_size
+    for sfnt_version, entries, head in members:
+        directory = sfnt_directory(sfnt_version, entries)
+        if head is not None:
+            total = table_checksum(directory) + sum(checksum for _, checksum, _, _ in entries)
+            head[8:12] = struct.pack(">L", (CHECKSUM_MAGIC - total) & 0xFFFFFFFF)
+        offsets.append(position)
+        directories.append(directory)
+        position += len(directory)
+
+    temp_path = output_path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(TTC_HEADER.pack(b"ttcf", 0x00010000, len(fonts)))
+        f.write(struct.pack(f">{len(offsets)}L", *offsets))
+        for directory in directories:
+            f.write(directory)
+        for data in blobs:
+            f.write(data)
+            f.write(b"\0" * (-len(data) % 4))
+    os.replace(temp_path, output_path)
+    written = sum((len(data) + 3) & ~3 for data in blobs)
+    return written, unshared
+
+def save_font(font, output_path):
+    """Save a TTFont by recompiling only the tables that were loaded or added.
+
+    Tables that were never decompiled are streamed from the source file as
+    raw bytes in their original order, so a name or metric edit on a large
+    font does not touch glyf. Falls back to TTFont.save for fonts that were
+    not read from an SFNT file (new fonts, WOFF/WOFF2 output).
+    """
+    reader = font.reader
+    if reader is None or font.flavor or reader.flavor:
+        font.save(output_path)
+        return
+
+    compiled = {}
+
+    def compile_table(tag):
+        if tag in compiled:
+            return
+        # 与 TTFont._writeTable 一致：先编译依赖的表（maxp/loca/glyf 会重算 head 的 bbox）
+        for dependency in getTableClass(tag).dependencies:
+            if font.isLoaded(dependency):
+                compile_table(dependency)
+        compiled[tag] = font.getTableData(tag)
+
+    # 编译过程中可能加载新表（如 maxp 重算时加载 head），循环到没有新表为止；head 总是最后编译
+    while True:
+        pending = [tag for tag in font.tables if tag not in ('GlyphOrder', 'head') and tag not in compiled]
+        if not pending:
+            break
+        for tag in pending:
+            compile_table(tag)
+    if font.isLoaded('head'):
+        compiled['head'] = font.getTableData('head')
+    loaded = list(compiled)
+    order = [tag for tag in reader.tables if tag in font]
+    order += sorted(tag for tag in loaded if tag not in reader.tables)
+    tables = [(tag, compiled[tag] if tag in compiled else reader[tag]) for tag in order]
+    write_sfnt(output_path, font.sfntVersion, tables)
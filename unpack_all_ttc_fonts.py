@@ -1,18 +1,67 @@
-from fontTools.ttLib import TTCollection
 import os
 import sys
+import mmap
+import time
+import multiprocessing as mp
+from sfnt_io import read_ttc_offsets, read_sfnt_directory, write_sfnt
 
-# 从命令行参数获取TTC文件路径
-ttc_file_path = sys.argv[1]
+def extract_member(ttc_path, index, output_path):
+    """Write member `index` of a TTC as a standalone TTF straight from its table bytes.
 
-# 加载TTC文件
-ttc_collection = TTCollection(ttc_file_path)
+    Nothing is decompiled: the file is memory-mapped and each table is
+    copied through as is, so memory use stays near one table's size.
+    Returns the number of bytes written.
+    """
+    with open(ttc_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        offsets = read_ttc_offsets(data)
+        if not 0 <= index < len(offsets):
+            raise ValueError(f"子字体编号 {index} 超出范围（共 {len(offsets)} 个）")
+        sfnt_version, entries = read_sfnt_directory(data, offsets[index])
+        view = memoryview(data)
+        # 按原文件中的物理顺序写出
+        tables = [(tag, view[offset:offset + length]) for tag, offset, length in sorted(entries, key=lambda e: e[1])]
+        try:
+            write_sfnt(output_path, sfnt_version, tables)
+        finally:
+            for _, table in tables:
+                table.release()
+            view.release()
+    return os.path.getsize(output_path)
 
-# 获取TTC文件名（不含扩展名）
-ttc_filename = os.path.splitext(os.path.basename(ttc_file_path))[0]
+def _extract_task(task):
+    ttc_path, index, output_path = task
+    start = time.time()
+    size = extract_member(ttc_path, index, output_path)
+    return index, output_path, size, time.time() - start
 
-# 遍历TTC中的每个字体并保存为TTF文件
-for index, font in enumerate(ttc_collection.fonts):
-    ttf_file_path = f"{ttc_filename}_font_{index}.ttf"
-    font.save(ttf_file_path)
-    print(f"字体另存为 {ttf_file_path}")
\ No newline at end of file
+def unpack_ttc(ttc_path, output_dir='', jobs=None):
+    """Split every member of a TTC into `<name>_font_<i>.ttf`; returns the output paths."""
+    with open(ttc_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        count = len(read_ttc_offsets(data))
+    ttc_filename = os.path.splitext(os.path.basename(ttc_path))[0]
+    tasks = [(ttc_path, index, os.path.join(output_dir, f"{ttc_filename}_font_{index}.ttf"))
+             for index in range(count)]
+
+    # 主要耗时在磁盘读写，多进程只在多核且成员较多时有帮助
+    jobs = max(1, min(jobs or mp.cpu_count(), count))
+    if jobs > 1:
+        with mp.Pool(jobs) as pool:
+            results = sorted(pool.imap_unordered(_extract_task, tasks))
+    else:
+        results = [_extract_task(task) for task in tasks]
+    for index, output_path, size, elapsed in results:
+        print(f"字体另存为 {output_path} ({size / 1024 / 1024:.1f} MB, {elapsed:.2f}s)")
+    return [output_path for _, output_path, _, _ in results]
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--jobs=')]
+    jobs = [int(arg.split('=', 1)[1]) for arg in sys.argv[1:] if arg.startswith('--jobs=')]
+    if not args:
+        print("用法: python unpack_all_ttc_fonts.py <TTC文件> [--jobs=N]")
+        sys.exit(1)
+
+    # 从命令行参数获取TTC文件路径
+    ttc_file_path = args[0]
+    start = time.time()
+    outputs = unpack_ttc(ttc_file_path, jobs=jobs[0] if jobs else None)
+    print(f"共解包 {len(outputs)} 个字体，耗时: {time.time() - start:.2f}s")
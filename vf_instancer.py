@@ -0,0 +1,134 @@
+import os
+import sys
+import time
+import multiprocessing as mp
+from fontTools.ttLib import TTFont
+from fontTools.varLib import instancer
+from sfnt_io import save_font
+from memory_info import available_memory
+
+# 实例化会修改或重建的表：父进程预先解码，子进程 fork 后直接继承
+INSTANCER_TABLES = ('fvar', 'avar', 'STAT', 'glyf', 'gvar', 'cvar', 'HVAR', 'VVAR', 'MVAR',
+                    'hmtx', 'vmtx', 'GDEF', 'GSUB', 'GPOS', 'head', 'hhea', 'maxp', 'OS/2', 'name')
+# 解码后的 fontTools 对象约为文件大小的 10 倍，每个子进程写时复制后各占一份
+DECODED_FACTOR = 10
+
+_font = None
+
+def named_weights(font):
+    """wght values of the font's named instances (fvar.instances), sorted and de-duplicated."""
+    if 'fvar' not in font:
+        return []
+    return sorted({instance.coordinates['wght'] for instance in font['fvar'].instances
+                   if 'wght' in instance.coordinates})
+
+def format_weight(weight):
+    """400.0 -> '400', 350.5 -> '350.5' (same as list_fonts.display_instances_info)."""
+    return str(int(weight)) if float(weight).is_integer() else str(weight)
+
+def load_variable_font(path):
+    """Parse a VF once, decoding glyf outlines and gvar deltas up front so workers can share them."""
+    font = TTFont(path)
+    if 'fvar' not in font:
+        raise ValueError(f"{os.path.basename(path)} 不是可变字体")
+    for tag in INSTANCER_TABLES:
+        if tag in font:
+            font[tag]
+    if 'glyf' in font:
+        glyf = font['glyf']
+        for name in font.getGlyphOrder():
+            glyf[name]
+    if 'gvar' in font:
+        font['gvar'].ensureDecompiled()
+    return font
+
+def static_location(font, weight):
+    """Full instance location: wght set, every other axis pinned to its default."""
+    location = {axis.axisTag: axis.defaultValue for axis in font['fvar'].axes}
+    location['wght'] = weight
+    return location
+
+def _init_worker(path):
+    # 不支持 fork 的平台：每个子进程解析一次，而不是每个字重解析一次
+    global _font
+    _font = load_variable_font(path)
+
+def _instance_task(task):
+    weight, output_path, inplace = task
+    start = time.time()
+    static = instancer.instantiateVariableFont(_font, static_location(_font, weight), inplace=inplace)
+    # save_font 先编译 glyf/maxp 再编译 head，head 的 bbox 是实例自己的轮廓范围
+    save_font(static if static is not None else _font, output_path)
+    return weight, output_path, time.time() - start
+
+def pool_size(path, count, jobs=None):
+    """Workers to use: bounded by cores, by the number of weights and by available memory."""
+    workers = min(jobs or mp.cpu_count(), count)
+    memory = available_memory()
+    if memory is not None:
+        workers = min(workers, memory // (DECODED_FACTOR * os.path.getsize(path)))
+    return max(1, workers)
+
+def instantiate_weights(path, weights=None, output_dir=None, jobs=None):
+    """Write one static TTF per weight from a VF, parsing and decoding it only once.
+
+    weights defaults to the named instances in fvar. Outputs go to
+    `<name>_fonts/<name>_wght_<weight>.ttf`. With fork every weight runs in
+    a fresh child of the parent that holds the decoded font; elsewhere each
+    worker parses the font once. Returns [(weight, output path, seconds)].
+    """
+    global _font
+    start = time.time()
+    font = load_variable_font(path)
+    weights = list(weights) if weights else named_weights(font)
+    if not weights:
+        raise ValueError(f"{os.path.basename(path)} 没有命名实例，请指定字重")
+    axis = next((axis for axis in font['fvar'].axes if axis.axisTag == 'wght'), None)
+    if axis is None:
+        raise ValueError(f"{os.path.basename(path)} 没有 wght 轴")
+    for weight in weights:
+        if not axis.minValue <= weight <= axis.maxValue:
+            raise ValueError(f"字重 {format_weight(weight)} 超出范围 {format_weight(axis.minValue)}-{format_weight(axis.maxValue)}")
+    print(f"解析字体: {time.time() - start:.2f}s")
+
+    stem = os.path.splitext(os.path.basename(path))[0]
+    output_dir = output_dir or os.path.join(os.path.dirname(path), f"{stem}_fonts")
+    os.makedirs(output_dir, exist_ok=True)
+    outputs = [os.path.join(output_dir, f"{stem}_wght_{format_weight(weight)}.ttf") for weight in weights]
+
+    workers = pool_size(path, len(weights), jobs)
+    if "fork" in mp.get_all_start_methods():
+        # 每个字重在父进程的全新 fork 中处理，直接修改继承来的字体，省去深拷贝
+        _font = font
+        pool = mp.get_context("fork").Pool(workers, maxtasksperchild=1)
+        tasks = [(weight, output, True) for weight, output in zip(weights, outputs)]
+    else:
+        font.close()
+        pool = mp.Pool(workers, initializer=_init_worker, initargs=(path,))
+        tasks = [(weight, output, False) for weight, output in zip(weights, outputs)]
+    with pool:
+        results = list(pool.imap(_instance_task, tasks))
+    return results
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--jobs=')]
+    jobs = [int(arg.split('=', 1)[1]) for arg in sys.argv[1:] if arg.startswith('--jobs=')]
+    if not args:
+        print("用法: python vf_instancer.py <可变字体.ttf> [字重 ...] [--jobs=N]")
+        print("  不指定字重时提取 fvar 中的全部命名实例")
+        sys.exit(1)
+
+    path = args[0]
+    start = time.time()
+    try:
+        weights = [float(weight) for weight in args[1:]]
+        results = instantiate_weights(path, weights, jobs=jobs[0] if jobs else None)
+    except ValueError as e:
+        print(f"错误: {e}")
+        sys.exit(1)
+    for weight, output_path, elapsed in results:
+        print(f"字重 {format_weight(weight)}: {output_path} ({elapsed:.2f}s)")
+    print(f"共提取 {len(results)} 个字重，耗时: {time.time() - start:.2f}s")
+
+if __name__ == "__main__":
+    main()
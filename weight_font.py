@@ -1,7 +1,83 @@
 from fontTools.ttLib import TTFont
 from fontTools.pens.ttGlyphPen import TTGlyphPen
+import numpy as np
 import os
 import sys
+import time
+from scale_font import scale_outlines, update_font_bounds
+
+# 转角接近 180° 时（cos < -0.9375）不再外扩，避免尖刺；与 FreeType 的阈值相同
+MIN_TURN_COS = -0.9375
+# 每增加 1 em 的笔画宽度对应的 usWeightClass 增量：Lato 从 Regular(400) 到 Black(900)
+# 主干宽度约增加 0.13 em，约 4000/em，用于按描边量估算新的字重等级
+WEIGHT_CLASS_PER_EM = 4000
+
+def embolden_glyph(glyph, delta):
+    """Offset every contour of a simple glyph along its normals so stems grow by `delta` units.
+
+    Works on the control polygon like FreeType's FT_Outline_EmboldenXY: each
+    point moves along the bisector of its two edge normals, far enough that
+    both edges shift by delta/2 (a miter), capped at inner corners so short
+    edges do not overshoot. Off-curve points move with the polygon, so the
+    quadratic curves, point count and on/off-curve flags are kept. A
+    negative delta thins the glyph.
+    """
+    if glyph.numberOfContours <= 0 or len(glyph.coordinates) == 0:
+        return glyph
+
+    points = np.frombuffer(glyph.coordinates.array, dtype=np.float64).reshape(-1, 2)
+    ends = np.asarray(glyph.endPtsOfContours, dtype=np.int64)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    index = np.arange(len(points))
+    prev_index = index - 1
+    prev_index[starts] = ends
+    next_index = index + 1
+    next_index[ends] = starts
+
+    # 每个点的出边；入边即前一点的出边
+    edges = points[next_index] - points
+    lengths = np.hypot(edges[:, 0], edges[:, 1])
+    units = np.divide(edges, lengths[:, None], out=np.zeros_like(edges), where=lengths[:, None] > 0)
+    out_units, out_lengths = units.copy(), lengths.copy()
+    in_units, in_lengths = units[prev_index], lengths[prev_index]
+    # 重合点（如闭合处重复的起点）的零长度边借用相邻边，两点因此移动相同距离
+    zero = lengths == 0
+    out_units[zero], out_lengths[zero] = units[next_index[zero]], lengths[next_index[zero]]
+    zero_in = zero[prev_index]
+    before = prev_index[prev_index[zero_in]]
+    in_units[zero_in], in_lengths[zero_in] = units[before], lengths[before]
+
+    # TrueType 外轮廓为顺时针（面积为负），外侧在前进方向的左边
+    x, y = points[:, 0], points[:, 1]
+    area = np.sum(x * y[next_index] - x[next_index] * y)
+    orientation = 1.0 if area <= 0 else -1.0
+    normals = orientation * np.stack([-(in_units[:, 1] + out_units[:, 1]), in_units[:, 0] + out_units[:, 0]], axis=1)
+
+    strength = delta / 2.0
+    cos = np.einsum('ij,ij->i', in_units, out_units)
+    d = 1.0 + cos
+    q = orientation * (in_units[:, 0] * out_units[:, 1] - in_units[:, 1] * out_units[:, 0])
+    limit = np.minimum(in_lengths, out_lengths)
+    valid = cos > MIN_TURN_COS
+    with np.errstate(divide='ignore', invalid='ignore'):
+        factor = np.where(strength * q <= limit * d, strength / d, limit / q)
+    factor = np.where(valid, factor, 0.0)
+
+    np.add(points, normals * factor[:, None], out=points)
+    np.floor(points + 0.5, out=points)
+    # 轮廓已改变，原提示指令不再适用
+    glyph.removeHinting()
+    return glyph
+
+def embolden_font(font, delta):
+    """Embolden every glyph by `delta` font units across the process pool; advances are kept.
+
+    Returns the elapsed seconds.
+    """
+    start = time.time()
+    bounds, has_outline = scale_outlines(font, delta, engine=embolden_glyph)
+    update_font_bounds(font, bounds, has_outline)
+    return time.time() - start
 
 def fake_bold_glyph(glyph, glyfTable, weight_factor):
     """Approximate 'bold' by shifting each point horizontally away from the center."""
@@ -99,11 +175,42 @@ def make_font_bolder(font_path, weight_factor):
     font.save(output_path)
     print(f"已生成伪加粗字体: {output_path}")
 
+def make_font_stroke(font_path, delta):
+    """Outline-offset emboldening: stems grow by `delta` font units, curves and advances are kept."""
+    font = TTFont(font_path)
+    total_glyphs = len(font.getGlyphOrder())
+    print(f"开始处理 {total_glyphs} 个字形（描边 {delta:+g} 单位）...")
+    elapsed = embolden_font(font, delta)
+    print(f"\n加粗完成，耗时: {elapsed:.2f}s，速度: {total_glyphs / max(elapsed, 1e-9):.0f} 字形/秒")
+
+    # 与系数方式一样更新 OS/2 字重等级：按笔画增加的宽度（占 em 的比例）估算
+    if "OS/2" in font:
+        os2 = font["OS/2"]
+        old_weight = os2.usWeightClass
+        step = delta / font["head"].unitsPerEm * WEIGHT_CLASS_PER_EM
+        os2.usWeightClass = max(100, min(1000, int(round(old_weight + step))))
+        print(f"字重等级: {old_weight} -> {os2.usWeightClass}")
+
+    base_dir = os.path.dirname(font_path)
+    base_name = os.path.basename(font_path)
+    new_name = f"修改字重s{delta:+g}_{base_name}"
+    output_path = os.path.join(base_dir, new_name) if base_dir else new_name
+    font.save(output_path)
+    print(f"原文件: {os.path.getsize(font_path) / 1024:.1f} KB，新文件: {os.path.getsize(output_path) / 1024:.1f} KB")
+    print(f"已生成加粗字体: {output_path}")
+
 if __name__ == "__main__":
-    if len(sys.argv) < 3:
+    stroke = [arg.split('=', 1)[1] for arg in sys.argv[1:] if arg.startswith('--stroke=')]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--stroke=')]
+    if not args or (not stroke and len(args) < 2):
         print("用法: python weight_font.py <字体文件.ttf> <字重系数(>1的浮点数)>")
+        print("      python weight_font.py <字体文件.ttf> --stroke=<描边增量(字体单位)>")
+        print("  --stroke  沿法线外扩轮廓，保留曲线，笔画加粗指定单位（负数变细）")
         sys.exit(1)
 
-    input_font = sys.argv[1]
-    factor = float(sys.argv[2])
-    make_font_bolder(input_font, factor)
\ No newline at end of file
+    input_font = args[0]
+    if stroke:
+        make_font_stroke(input_font, float(stroke[0]))
+    else:
+        factor = float(args[1])
+        make_font_bolder(input_font, factor)
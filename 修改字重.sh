@@ -40,6 +40,28 @@ fi
 
 selected_file="${files[$choice-1]}"
 
+echo "请选择加粗方式："
+echo "1. 轮廓描边加粗（沿法线外扩，保留曲线，多进程）"
+echo "2. 旧的水平拉伸方式（按系数）"
+read mode
+
+if [[ $mode == "1" ]]; then
+    echo "请输入笔画加粗的字体单位数 (例如: 30，负数变细)："
+    read stroke
+    if ! [[ $stroke =~ ^-?[0-9]+(\.[0-9]+)?$ ]]; then
+        echo "请输入数字"
+        exit 1
+    fi
+    python3 weight_font.py "$selected_file" "--stroke=$stroke"
+    status=$?
+    if [ $status -eq 0 ]; then
+        echo "字体字重修改完成！"
+    else
+        echo "修改失败，请检查错误信息。"
+    fi
+    exit $status
+fi
+
 # Prompt for weight scale
 echo "请输入字重缩放比例 (例如: 1.2 或 120%)："
 read scale_input
@@ -12,8 +12,29 @@ echo "可用的 TTF 文件:"
 for i in "${!TTF_FILES[@]}"; do
   echo "$i) ${TTF_FILES[$i]}"
 done
+echo "a) 全部（并行处理当前目录所有 TTF）"
 
 read -p "请输入要添加字距调整的 TTF 文件编号: " choice
+
+OPTIONS=()
+read -p "规则文件路径（直接回车使用默认规则）: " rules_file
+if [ -n "$rules_file" ]; then
+  if [ ! -f "$rules_file" ]; then
+    echo "规则文件不存在: $rules_file"
+    exit 1
+  fi
+  OPTIONS+=("--rules=$rules_file")
+fi
+read -p "是否写入 GPOS 而不改动字形宽度？(y/N): " use_gpos
+if [[ "$use_gpos" == "y" || "$use_gpos" == "Y" ]]; then
+  OPTIONS+=("--gpos")
+fi
+
+if [ "$choice" == "a" ]; then
+  python3 modify_kerning.py . "${OPTIONS[@]}"
+  exit $?
+fi
+
 if [[ -z "$choice" || "$choice" -lt 0 || "$choice" -ge "${#TTF_FILES[@]}" ]]; then
   echo "无效的选择。"
   exit 1
@@ -22,5 +43,5 @@ fi
 selected_file="${TTF_FILES[$choice]}"
 output_file="标点间距_${selected_file}"
 
-python3 modify_kerning.py "$selected_file" "$output_file"
-echo "已生成: $output_file"
\ No newline at end of file
+python3 modify_kerning.py "$selected_file" "$output_file" "${OPTIONS[@]}"
+echo "已生成: $output_file"
@@ -0,0 +1,28 @@
+#!/bin/bash
+
+# 遍历当前目录下的 TTF 文件
+counter=1
+files=()
+for file in *.ttf; do
+    echo "${counter}. ${file}"
+    files+=("$file")
+    counter=$((counter + 1))
+done
+
+echo "请输入要修改的 TTF 的编号："
+read choice
+
+if [[ $choice -le 0 || $choice -gt ${#files[@]} ]]; then
+    echo "无效的选择，请重新运行脚本。"
+    exit 1
+fi
+
+selected_file="${files[$choice-1]}"
+
+# 字体只加载一次，依次生成华为、小米、oppo、荣耀、vivo 五个版本
+python3 metric_profiles.py "$selected_file" all
+if [ $? -eq 0 ]; then
+    echo "度量数据修改完成！已生成全部厂商版本。"
+else
+    echo "修改失败，请检查错误信息。"
+fi
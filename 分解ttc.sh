@@ -41,8 +41,7 @@ if [ ! -f "$UNPACK_SCRIPT" ]; then
 fi
 
 # 调用Python脚本来解包TTC中的所有字体
-echo "正在从选定的TTC文件中提取字体...
-请耐心等待 时间长短取决于ttc字体文件以及手机CPU超大核单核性能"
+echo "正在从选定的TTC文件中提取字体...（直接复制表数据，不解析字形）"
 python3 "$UNPACK_SCRIPT" "$TTC_FILE"
 
 # 检查Python脚本是否成功执行
@@ -4,10 +4,9 @@
 # 列出当前目录中的 TTF 文件
 echo "
 
-不同UPM单位的字体合并到一起会有显示问题
-如果合并完成有bug
-请先运行改《查看UPM脚本》确定是否是统一的1000
-如果不是，再运行《修改UPM脚本》改为统一1000再来合并！！！
+次字体的UPM与主字体不同时
+导入的字形、组件偏移和步进宽度会自动按主字体的UPM缩放
+无需再先运行《修改UPM脚本》
 
 当主字体是可变字体 次字体是单字重字体时
 两者必须都包含需要合并的符号 否则无法正确合并
@@ -45,14 +44,6 @@ if [[ $main_index -lt 1 || $main_index -gt ${#ttf_files[@]} ]]; then
 fi
 main_font="${ttf_files[$((main_index - 1))]}"
 
-# 选择次字体
-read -p "请选择次字体文件的序号 (1-${#ttf_files[@]}): " secondary_index
-if [[ $secondary_index -lt 1 || $secondary_index -gt ${#ttf_files[@]} || $secondary_index -eq main_index ]]; then
-    echo "无效的序号或选择了相同的字体"
-    exit 1
-fi
-secondary_font="${ttf_files[$((secondary_index - 1))]}"
-
 # 显示符号范围供用户选择, 查找字符编码参考链接
 # https://www.babelstone.co.uk/Unicode/whatisit.html
 # https://codepoints.net/U+2019?lang=en
@@ -61,35 +52,63 @@ secondary_font="${ttf_files[$((secondary_index - 1))]}"
 #               如果不加上，合并后的字体在显示英文文章时会留下巨大的空格。
 # 0x2000-0x206F 整个general puctuation。 见 https://codepoints.net/general_punctuation
 symbol_ranges=("0x0030-0x0039" "0x0021-0x007E 0x2000-0x206F" "0x2800-0x28FF" "自定义输入")
-echo "可用的符号编码范围："
-for i in "${!symbol_ranges[@]}"; do
-    case $i in
-        0) description="仅数字" ;;
-        1) description="基本拉丁文 - Basic latin，General punctuation" ;;
-        2) description="盲文" ;;
-        3) description="自定义输入" ;;
-    esac
-    echo "$((i + 1)): ${symbol_ranges[i]} ($description)"
-done
 
-# 选择符号范围
-read -p "请选择要替换的符号范围编号 (1-${#symbol_ranges[@]}): " range_index
+choose_range() {
+    echo "可用的符号编码范围："
+    for i in "${!symbol_ranges[@]}"; do
+        case $i in
+            0) description="仅数字" ;;
+            1) description="基本拉丁文 - Basic latin，General punctuation" ;;
+            2) description="盲文" ;;
+            3) description="自定义输入" ;;
+        esac
+        echo "$((i + 1)): ${symbol_ranges[i]} ($description)"
+    done
 
-if [[ $range_index -lt 1 || $range_index -gt ${#symbol_ranges[@]} ]]; then
-    echo "无效的范围编号"
-    exit 1
-fi
+    # 选择符号范围
+    read -p "请选择要替换的符号范围编号 (1-${#symbol_ranges[@]}): " range_index
 
-if [[ $range_index -eq ${#symbol_ranges[@]} ]]; then
-    read -p "请输入字符 支持以下几种格式
-    单个字符
-    多个字符用空格分隔  比如《我 饿 了》
-    字符范围 比如0-8 输入0x0030-0x0038
-    ： " custom_input
-    selected_range="$custom_input"
-else
-    selected_range=${symbol_ranges[$((range_index - 1))]}
-fi
+    if [[ $range_index -lt 1 || $range_index -gt ${#symbol_ranges[@]} ]]; then
+        echo "无效的范围编号"
+        exit 1
+    fi
+
+    if [[ $range_index -eq ${#symbol_ranges[@]} ]]; then
+        read -p "请输入字符 支持以下几种格式
+        单个字符
+        多个字符用空格分隔  比如《我 饿 了》
+        字符范围 比如0-8 输入0x0030-0x0038
+        排除范围 前面加! 比如 !0x2018-0x2019
+        ： " custom_input
+        selected_range="$custom_input"
+    else
+        selected_range=${symbol_ranges[$((range_index - 1))]}
+    fi
+}
+
+# 选择次字体及其范围，可以依次添加多个，排在前面的优先
+sources=()
+while true; do
+    read -p "请选择次字体文件的序号 (1-${#ttf_files[@]}): " secondary_index
+    if [[ $secondary_index -lt 1 || $secondary_index -gt ${#ttf_files[@]} || $secondary_index -eq main_index ]]; then
+        echo "无效的序号或选择了相同的字体"
+        exit 1
+    fi
+    secondary_font="${ttf_files[$((secondary_index - 1))]}"
+
+    choose_range
+    sources+=("$secondary_font" "$selected_range")
+
+    read -p "是否继续添加次字体？范围重叠时先添加的字体优先 (y/N): " add_more
+    [[ "$add_more" == "y" || "$add_more" == "Y" ]] || break
+done
+
+# 可选：从上面的范围中排除一部分
+read -p "需要排除的范围（格式同上，直接回车跳过）: " exclude_range
 
 # 调用 Python 脚本进行合并替换
-python merge_fonts.py "$main_font" "$secondary_font" "$selected_range"
\ No newline at end of file
+if [[ -n "$exclude_range" ]]; then
+    python merge_fonts.py "$main_font" "${sources[@]}" "--exclude=$exclude_range"
+else
+    python merge_fonts.py "$main_font" "${sources[@]}"
+fi
\ No newline at end of file
@@ -0,0 +1,39 @@
+#!/bin/bash
+
+# 将多个 TTF 打包为一个 TTC，相同的表只存储一份
+TTF_FILES=(*.ttf)
+
+if [ ! -f "${TTF_FILES[0]}" ]; then
+  echo "当前目录没有 ttf 文件。"
+  exit 1
+fi
+
+echo "可用的 TTF 文件:"
+for i in "${!TTF_FILES[@]}"; do
+  echo "$i) ${TTF_FILES[$i]}"
+done
+
+read -p "请输入要打包的 TTF 文件编号（空格分隔，按输入顺序排列）: " -a choices
+if [ ${#choices[@]} -lt 2 ]; then
+  echo "至少需要选择两个字体。"
+  exit 1
+fi
+
+selected=()
+for choice in "${choices[@]}"; do
+  if ! [[ "$choice" =~ ^[0-9]+$ ]] || [ "$choice" -ge ${#TTF_FILES[@]} ]; then
+    echo "无效的选择: $choice"
+    exit 1
+  fi
+  selected+=("${TTF_FILES[$choice]}")
+done
+
+default_name="$(basename "${selected[0]}" .ttf).ttc"
+read -p "输出文件名（直接回车使用 $default_name）: " output_file
+output_file="${output_file:-$default_name}"
+
+python3 pack_ttc_fonts.py "$output_file" "${selected[@]}"
+if [ $? -ne 0 ]; then
+  echo "打包失败！"
+  exit 1
+fi
@@ -26,25 +26,14 @@ if [ -z "$VF_FILE" ]; then
     exit 1
 fi
 
-# 创建输出目录，以字体名称命名
-OUTPUT_DIR="${VF_FILE%.*}_fonts"
-mkdir -p "$OUTPUT_DIR"
-
-echo "请输入要提取的字重，用空格分隔："
+echo "请输入要提取的字重，用空格分隔（直接回车提取全部命名实例）："
 read -r weights
 
-# 将用户输入的字重分割成数组
-IFS=' ' read -ra weight_array <<< "$weights"
-
-# 遍历数组并执行相应的操作
-for weight in "${weight_array[@]}"; do
-  echo "正在提取字重：$weight"
-  # 确保 fonttools 和 varLib.instancer 可用，这里假设它们已经被正确安装
-  OUTPUT_FILE="$OUTPUT_DIR/${VF_FILE%.*}_wght_$weight.ttf"
-  fonttools varLib.instancer "$VF_FILE" "wght=$weight" -o "$OUTPUT_FILE"
-  if [ $? -ne 0 ]; then
-    echo "提取字重 $weight 失败。"
-  fi
-done
+# 字体只解析一次，所有字重在同一次调用中提取；输出到以原文件名命名的文件夹
+python3 vf_instancer.py "$VF_FILE" $weights
+if [ $? -ne 0 ]; then
+    echo "提取字重失败。"
+    exit 1
+fi
 
-echo "提取字重已完成！文件保存在以原文件名命名的文件夹中"
\ No newline at end of file
+echo "提取字重已完成！文件保存在以原文件名命名的文件夹中"
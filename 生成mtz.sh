@@ -1,40 +1,38 @@
 #!/bin/bash
 
-# Get TTF/TTC files sorted by modification time
-declare -A file_times
-for file in *.ttf *.ttc; do
-    [[ -f "$file" ]] || continue
-    file_times["$file"]=$(stat -c %Y "$file")
-done
+# 从目录清单读取 TTF/TTC 文件（按修改时间从新到旧），只有新增或改动的文件会被重新读取
+files=()
+mtimes=()
+while IFS=$'\t' read -r file mtime; do
+    files+=("$file")
+    mtimes+=("$mtime")
+done < <(python3 font_catalog.py files --ext=ttf,ttc --mtime)
 
-# Check for TTF/TTC files
-if [ ${#file_times[@]} -eq 0 ]; then
-    echo "当前目录没有找到 TTF/TTC 文件。"
+if [ ${#files[@]} -eq 0 ]; then
+    echo "当前目录下没有找到 TTF/TTC 文件。"
     exit 1
 fi
 
-# Sort by modification time (newest first)
-readarray -t files < <(
-    for file in "${!file_times[@]}"; do
-        echo "${file_times[$file]}|$file"
-    done | sort -rn | cut -d'|' -f2
-)
-
 # Display sorted files with dates
 for i in "${!files[@]}"; do
-    counter=$((i + 1))
-    mtime=$(date -r "${files[i]}" "+%Y-%m-%d %H:%M:%S")
-    echo "${counter}. ${files[i]} ($mtime)"
+    echo "$((i + 1)). ${files[i]} (${mtimes[i]})"
 done
 
-if [ ${#files[@]} -eq 0 ]; then
-    echo "当前目录下没有找到 TTF/TTC 文件。"
-    exit 1
-fi
-
+echo "a. 全部（批量生成当前目录所有字体）"
 echo "请输入要生成 MTZ 的字体编号："
 read choice
 
+if [ "$choice" == "a" ]; then
+    python3 mtz_make.py --batch .
+    status=$?
+    if [ $status -eq 0 ]; then
+        echo "MTZ 批量生成完成！"
+    else
+        echo "部分字体生成失败，请查看上方汇总。"
+    fi
+    exit $status
+fi
+
 if [[ $choice -le 0 || $choice -gt ${#files[@]} ]]; then
     echo "无效的选择，请重新运行脚本。"
     exit 1